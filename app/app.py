@@ -8,6 +8,11 @@ import styles
 from components.image_upload import render_image_uploader
 from components.ingredient_input import render_ingredient_input
 from components.cook_button import render_cook_button
+from utils.image_predict import start_warmup
+
+# Load the image model on a background thread: the page renders right away
+# and photo uploads only wait if the model isn't ready yet
+start_warmup()
 
 # Apply CSS after page config
 styles.apply_styles()
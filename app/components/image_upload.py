@@ -1,7 +1,16 @@
 import streamlit as st
-from PIL import Image
-import io
-from utils.image_predict import predict_image  # model predict function
+from contextlib import nullcontext
+from utils.image_predict import predict_image_bytes, model_status  # model predict function
+from utils.image_preprocess import prepare_many
+from utils.prediction_cache import bytes_digest
+from utils.inference_server import QueueFull
+
+
+def _waiting_for_model():
+    """Spinner while the background model load is still running."""
+    if model_status() == "ready":
+        return nullcontext()
+    return st.spinner("Loading the ingredient recognition model...")
 
 
 def render_image_uploader():
@@ -18,6 +27,14 @@ def render_image_uploader():
     """,
     unsafe_allow_html=True,
 )
+    # --- MODEL STATE (loaded in the background, see app.py) ---
+    status = model_status()
+    if status in ("idle", "loading"):
+        st.caption("🧠 The ingredient recognition model is still loading. "
+                   "You can upload photos now; they'll be identified once it's ready.")
+    elif status == "failed":
+        st.warning("Photo recognition is unavailable right now. Please type your ingredients instead.")
+
     # --- FILE UPLOADER (ONLY FOR ADDING NEW IMAGES) ---
     uploaded = st.file_uploader(
         "Choose images",
@@ -35,6 +52,7 @@ def render_image_uploader():
         # Only rebuild images if the uploader selection actually changed
         if st.session_state.uploader_files_sig != file_sig:
             new_images = []
+            busy = False
             seen_files = set()  # <-- NEW: track (name, size) pairs
 
             for file in uploaded:
@@ -45,21 +63,55 @@ def render_image_uploader():
                 seen_files.add(key)
 
                 data = file.read()
-                img_info = {"name": file.name, "bytes": data}
-
-                # Run model prediction once per image
+                new_images.append({"name": file.name, "bytes": data, "prediction": None})
+
+            # Photos already identified in this session keep their thumbnail
+            # and label, so re-adding one costs a hash, not a decode
+            previous = {
+                img["digest"]: img
+                for img in st.session_state.images
+                if img.get("digest") and img.get("prediction")
+            }
+            fresh = []
+            for img_info in new_images:
+                img_info["digest"] = bytes_digest(img_info["bytes"])
+                known = previous.get(img_info["digest"])
+                if known is not None:
+                    img_info["thumbnail"] = known.get("thumbnail")
+                    img_info["prediction"] = known["prediction"]
+                else:
+                    fresh.append(img_info)
+
+            # Decode each new photo once (in parallel): the thumbnail is what
+            # we display, the model input is classified if no session has
+            datas = [img["bytes"] for img in fresh]
+            prepared = prepare_many(datas)
+            for img_info, p in zip(fresh, prepared):
+                img_info["thumbnail"] = p.thumbnail if p is not None else None
+
+            # One call for the new photos: ones seen before (in any session)
+            # come from the prediction cache, the rest are batched
+            if fresh:
                 try:
-                    pil_img = Image.open(io.BytesIO(data))
-                    pred = predict_image(pil_img)
-                    img_info["prediction"] = pred
+                    with _waiting_for_model():
+                        preds = predict_image_bytes(datas, prepared=prepared)
+                    for img_info, pred in zip(fresh, preds):
+                        img_info["prediction"] = pred
+                except QueueFull as e:
+                    # server busy: keep the labels that were already known and
+                    # leave the signature unset, so the next rerun classifies
+                    # only the rest
+                    for img_info, pred in zip(fresh, e.partial):
+                        img_info["prediction"] = pred
+                    busy = True
+                    st.warning("Lots of photos are being identified right now. "
+                               "Yours will be identified on your next click.")
                 except Exception:
-                    img_info["prediction"] = None
-
-                new_images.append(img_info)
+                    pass
 
             # Replace current images with this selection
             st.session_state.images = new_images
-            st.session_state.uploader_files_sig = file_sig
+            st.session_state.uploader_files_sig = None if busy else file_sig
 
 
 
@@ -86,9 +138,8 @@ def render_image_uploader():
         for idx, img_data in enumerate(images):
             with cols[idx % 2]:
                 try:
-                    pil_img = Image.open(io.BytesIO(img_data["bytes"]))
                     st.image(
-                        pil_img,
+                        img_data.get("thumbnail") or img_data["bytes"],
                         caption=(
                             f"📷 {img_data['name']}"
                             + (
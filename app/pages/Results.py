@@ -12,7 +12,9 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-from scripts.recipe_search import load_recipes, match_recipes  # noqa: E402
+from scripts.recipe_search import (  # noqa: E402
+    QuerySession, catalog_key, load_recipes, match_recipes_dual,
+)
 
 
 # -------------------------------------------------
@@ -244,7 +246,11 @@ with st.expander("Your ingredients", expanded=True):
             cols = st.columns(3)
             for idx, img in enumerate(imgs[:3]):
                 with cols[idx % 3]:
-                    st.image(img["bytes"], caption=img["name"], use_container_width=True)
+                    st.image(
+                        img.get("thumbnail") or img["bytes"],
+                        caption=img["name"],
+                        use_container_width=True,
+                    )
             if len(imgs) > 3:
                 st.caption(f"+ {len(imgs) - 3} more photos")
         else:
@@ -257,9 +263,11 @@ st.markdown("<br>", unsafe_allow_html=True)
 # -------------------------------------------------
 # LOAD DATASET
 # -------------------------------------------------
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def _load_df():
-    # recipes live at data/raw/recipes.csv relative to project root
+    # recipes live at data/raw/recipes.csv relative to project root.
+    # cache_resource shares one read-only frame (and its ingredient index)
+    # across sessions instead of unpickling a copy on every rerun.
     return load_recipes("data/raw/recipes.csv")
 
 
@@ -316,11 +324,61 @@ def _badge_for_health(score: float):
 # -------------------------------------------------
 # MATCH RECIPES
 # -------------------------------------------------
+PAGE_SIZE = 7
+
+# "Ready in" choices -> max total minutes (None = any)
+TIME_LIMITS = {"Any time": None, "15 min": 15, "30 min": 30, "1 hour": 60, "2 hours": 120}
+
+
+def _more_cursor(ings, filters, served: int):
+    """
+    Cursor for "Load more" when the first page came from the result cache
+    (so nothing was scored here), past the `served` recipes already shown.
+
+    Per-user incremental state: only ingredients added / removed since
+    this session's last search are re-counted, and the cursor keeps the
+    scores so later pages don't search again.
+    """
+    session = st.session_state.get("query_session")
+    if session is None or not session.is_for(df):
+        session = QuerySession(df)
+        st.session_state.query_session = session
+    session.update(ings)
+    cursor = session.cursor(filters)
+    cursor.next_page(served)
+    return cursor
+
+
 if ings:
-    results = match_recipes(ings, df, quota=7)
+    # Optional filters, applied to the catalog before ranking
+    f_time, f_cuisine = st.columns(2)
+    with f_time:
+        time_label = st.selectbox("Ready in", list(TIME_LIMITS), key="filter_time")
+    with f_cuisine:
+        cuisine_text = st.text_input(
+            "Cuisine", key="filter_cuisine", placeholder="e.g. Italian, Mexican"
+        )
+    # comma-separated cuisines match any of them
+    cuisines = tuple(c.strip() for c in cuisine_text.split(",") if c.strip())
+    filters = {"max_minutes": TIME_LIMITS[time_label], "cuisine": cuisines or None}
+
+    # First page (and its healthiest column) from the process-wide result
+    # cache: a pantry any session already searched costs a lookup. On a
+    # miss, the cursor that scored it is kept, so "Load more" just slices
+    pantry_key = (catalog_key(df), tuple(sorted(ings)), tuple(sorted(filters.items())))
+    if st.session_state.get("results_key") != pantry_key:
+        first = match_recipes_dual(
+            ings, df, quota=PAGE_SIZE, filters=filters, keep_cursor=True
+        )
+        st.session_state.results_key = pantry_key
+        st.session_state.results = first["match"]
+        st.session_state.results_health = first["health"]
+        st.session_state.results_cursor = first["cursor"]
+    cursor = st.session_state.results_cursor
+    results = st.session_state.results
 
     if not results:
-        st.info("No direct matches found. Try adding more common ingredients ✨")
+        st.info("No direct matches found. Try adding more common ingredients or loosening the filters ✨")
     else:
         # Header row: one header per column
         col_match_header, col_health_header = st.columns(2)
@@ -345,13 +403,17 @@ if ings:
                 unsafe_allow_html=True,
             )
 
-        # Health column sorted separately
-        by_health = sorted(results, key=lambda r: r["health_score"], reverse=True)
+        # Healthiest of all good-enough matches, from the same scoring pass
+        # (not just the best-match page re-sorted)
+        if cursor is None:
+            by_health = st.session_state.results_health
+        else:
+            by_health = cursor.healthiest(len(results))
 
         # Row-by-row layout: each row has one match card + one health card
         for i in range(len(results)):
             rec_match = results[i]
-            rec_health = by_health[i]
+            rec_health = by_health[i] if i < len(by_health) else None
 
             # ---------- LEFT: ingredient match data ----------
             name = rec_match["name"]
@@ -389,45 +451,35 @@ if ings:
                 )
 
             # ---------- RIGHT: health-score data ----------
-            name_h = rec_health["name"]
-            hscore = rec_health["health_score"]
-            protein = rec_health["protein_g"]
-            fat = rec_health["fat_g"]
-            sugar = rec_health["sugar_g"]
-            carbs = rec_health["carbs_g"]
-
-            label_h, badge_class_h = _badge_for_health(hscore)
-            pct_h = int(hscore * 100)
-            url_h = rec_health.get("url", "").strip()
-
-            link_html_h = ""
-            if url_h:
-                link_html_h = (
-                    f'<div class="recipe-card-footer">'
-                    f'<a href="{url_h}" target="_blank" '
-                    'style="display:inline-block; padding: 0.45rem 1.1rem; '
-                    'border-radius: 999px; background: rgba(255,255,255,0.15); '
-                    'border: 1px solid rgba(255,255,255,0.35); font-size: 0.9rem; '
-                    'font-weight: 600; color: #ffffff; text-decoration: none;">'
-                    'View full recipe ↗'
-                    '</a>'
-                    '</div>'
-                )
-
-            # ---------- FULL ROW HTML (two cards side by side) ----------
-            row_html = f"""
-<div class="recipe-row">
-  <div class="recipe-card">
-    <h3>#{i+1} {name}
-        <span class="health-badge {badge_class}">{label}</span>
-    </h3>
-    <p><b>✅ Matched ingredients:</b> {hits} of {total}</p>
-    <p><b>📊 Your ingredients used:</b> {pct_u}%</p>
-    <p><b>📊 Recipe ingredients covered:</b> {pct_r}%</p>
-    <p class="muted">Ranked by ingredient compatibility</p>
-    {link_html}
-  </div>
-
+            # (fewer healthy picks than match cards leaves the slot empty)
+            health_card_html = "<div></div>"
+            if rec_health is not None:
+                name_h = rec_health["name"]
+                hscore = rec_health["health_score"]
+                protein = rec_health["protein_g"]
+                fat = rec_health["fat_g"]
+                sugar = rec_health["sugar_g"]
+                carbs = rec_health["carbs_g"]
+
+                label_h, badge_class_h = _badge_for_health(hscore)
+                pct_h = int(hscore * 100)
+                url_h = rec_health.get("url", "").strip()
+
+                link_html_h = ""
+                if url_h:
+                    link_html_h = (
+                        f'<div class="recipe-card-footer">'
+                        f'<a href="{url_h}" target="_blank" '
+                        'style="display:inline-block; padding: 0.45rem 1.1rem; '
+                        'border-radius: 999px; background: rgba(255,255,255,0.15); '
+                        'border: 1px solid rgba(255,255,255,0.35); font-size: 0.9rem; '
+                        'font-weight: 600; color: #ffffff; text-decoration: none;">'
+                        'View full recipe ↗'
+                        '</a>'
+                        '</div>'
+                    )
+
+                health_card_html = f"""
   <div class="recipe-card">
     <h3>#{i+1} {name_h}
         <span class="health-badge {badge_class_h}">{label_h}</span>
@@ -443,11 +495,40 @@ if ings:
     <p class="muted">Optimized for nutritional value</p>
     {link_html_h}
   </div>
+"""
+
+            # ---------- FULL ROW HTML (two cards side by side) ----------
+            row_html = f"""
+<div class="recipe-row">
+  <div class="recipe-card">
+    <h3>#{i+1} {name}
+        <span class="health-badge {badge_class}">{label}</span>
+    </h3>
+    <p><b>✅ Matched ingredients:</b> {hits} of {total}</p>
+    <p><b>📊 Your ingredients used:</b> {pct_u}%</p>
+    <p><b>📊 Recipe ingredients covered:</b> {pct_r}%</p>
+    <p class="muted">Ranked by ingredient compatibility</p>
+    {link_html}
+  </div>
+{health_card_html}
 </div>
 """
 
             st.markdown(row_html, unsafe_allow_html=True)
 
+        # ---------- LOAD MORE ----------
+        # a full first page may have more behind it; after that the cursor knows
+        if cursor.has_more if cursor is not None else len(results) == PAGE_SIZE:
+            st.markdown("<br>", unsafe_allow_html=True)
+            more1, more2, more3 = st.columns([1, 2, 1])
+            with more2:
+                if st.button("Load more recipes", use_container_width=True):
+                    if cursor is None:
+                        cursor = _more_cursor(ings, filters, served=len(results))
+                        st.session_state.results_cursor = cursor
+                    st.session_state.results = results + cursor.next_page(PAGE_SIZE)
+                    st.rerun()
+
 else:
     st.info("Type some ingredients on the Home page first.")
 
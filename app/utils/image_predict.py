@@ -1,16 +1,24 @@
 # app/utils/image_predict.py
+from __future__ import annotations
 
 import os
 import json
-import torch
+import hashlib
+import threading
+import warnings
+from functools import lru_cache
+from typing import List
+import numpy as np
 from PIL import Image
-from torchvision import transforms
-import timm
 
-# -------------------------
-# DEVICE
-# -------------------------
-device = "cuda" if torch.cuda.is_available() else "cpu"
+from utils.image_preprocess import Prepared, prepare_many, to_model_input
+from utils.inference_backends import BACKENDS, load_backend, missing_modules
+from utils.inference_server import InferenceServer, QueueFull
+from utils.prediction_cache import PredictionCache, bytes_digest, file_digest
+
+# torch / timm are imported on first model load, not here:
+# importing this module must stay cheap so pages render before the model
+# is ready (see start_warmup)
 
 # -------------------------
 # PATHS
@@ -18,6 +26,12 @@ device = "cuda" if torch.cuda.is_available() else "cpu"
 BASE_DIR = os.path.dirname(__file__)
 LABEL_MAP_PATH = os.path.join(BASE_DIR, "..", "model", "label_map.json")
 MODEL_PATH = os.path.join(BASE_DIR, "..", "model", "Food_Recognition_Model.pt")
+# Predictions shared across sessions and restarts; PANTRYPAL_PREDICTION_DB
+# overrides the location, an empty value keeps them in memory only
+PREDICTION_DB_PATH = os.environ.get(
+    "PANTRYPAL_PREDICTION_DB",
+    os.path.join(BASE_DIR, "..", "..", "data", "cache", "predictions.sqlite"),
+)
 
 # -------------------------
 # LOAD LABEL MAP
@@ -27,47 +41,324 @@ with open(LABEL_MAP_PATH, "r") as f:
 
 num_classes = len(labels)
 
+# Images per forward pass in predict_images; on CPU, batches of 8-16 get
+# most of the throughput win without a large memory spike
+PREDICT_BATCH_SIZE = 16
+
+# Micro-batching across sessions (see inference_server): the longest a
+# request waits for others to join its batch, and how many may queue
+# before new uploads are turned away with QueueFull
+BATCH_MAX_WAIT_MS = 10.0
+INFERENCE_QUEUE_SIZE = 256
+# Longest a caller waits for its labels; covers a cold model load (and a
+# first ONNX export) on the server thread, so a hung worker can't block
+# a session forever
+INFERENCE_TIMEOUT_S = 120.0
+
+# How the model runs on CPU: "eager", "torchscript", "onnx" or "onnx-int8"
+# (see utils/inference_backends.py; check parity before switching).
+# Resolved once here, so the predictor and the prediction cache's tag
+# always agree on the backend actually in use
+INFERENCE_BACKEND = os.environ.get("PANTRYPAL_INFERENCE_BACKEND", "eager").strip().lower()
+if INFERENCE_BACKEND not in BACKENDS:
+    warnings.warn(f"Unknown PANTRYPAL_INFERENCE_BACKEND {INFERENCE_BACKEND!r}; using eager")
+    INFERENCE_BACKEND = "eager"
+elif missing_modules(INFERENCE_BACKEND):
+    warnings.warn(
+        f"Inference backend {INFERENCE_BACKEND!r} needs "
+        f"{', '.join(missing_modules(INFERENCE_BACKEND))}; using eager"
+    )
+    INFERENCE_BACKEND = "eager"
+
+
 # -------------------------
-# REBUILD TRAINING MODEL
+# PREDICTOR
 # -------------------------
-model = timm.create_model(
-    "efficientnet_b0",
-    pretrained=False,          # IMPORTANT when loading custom weights
-    num_classes=num_classes,
-)
+class Predictor:
+    """
+    The fine-tuned EfficientNet-B0 behind one inference backend, with its
+    device and transform.
+
+    `backend` is one of inference_backends.BACKENDS. It is built as
+    asked or not at all (e.g. ImportError without its runtime); the
+    fallback to eager happens once, in INFERENCE_BACKEND.
+    """
+
+    def __init__(self, backend: str = INFERENCE_BACKEND):
+        import torch
+
+        self.torch = torch
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+
+        self.backend = load_backend(backend, _build_model, self.device, _model_tag())
+
+        # IMAGE TRANSFORM (same as training, see image_preprocess)
+        self.transform = lambda img: torch.from_numpy(to_model_input(img))
+
+    @property
+    def model(self):
+        """The eager torch module (only the "eager" backend keeps one)."""
+        return self.backend.model
+
+    def predict(self, image: Image.Image) -> str:
+        return self.predict_batch([image])[0]
+
+    def predict_batch(
+        self,
+        images: List[Image.Image],
+        batch_size: int = PREDICT_BATCH_SIZE,
+    ) -> List[str]:
+        """Labels for `images` in input order, `batch_size` per forward pass."""
+        return self.predict_arrays([to_model_input(img) for img in images], batch_size)
+
+    def predict_arrays(
+        self,
+        arrays: List[np.ndarray],
+        batch_size: int = PREDICT_BATCH_SIZE,
+    ) -> List[str]:
+        """Labels for already preprocessed inputs (image_preprocess.to_model_input)."""
+        torch = self.torch
+        preds: List[str] = []
+        with torch.inference_mode():
+            for start in range(0, len(arrays), batch_size):
+                x = torch.from_numpy(np.stack(arrays[start:start + batch_size]))
+                logits = self.backend(x)
+                preds.extend(labels[i] for i in logits.argmax(1).tolist())
+        return preds
+
+
+def _build_model(device: str):
+    """The eager training model with the fine-tuned weights, in eval mode."""
+    import torch
+    import timm
+
+    # REBUILD TRAINING MODEL
+    model = timm.create_model(
+        "efficientnet_b0",
+        pretrained=False,          # IMPORTANT when loading custom weights
+        num_classes=num_classes,
+    )
+
+    # LOAD STATE DICT
+    state_dict = torch.load(MODEL_PATH, map_location=device)
+    model.load_state_dict(state_dict)
+    model.to(device)
+    model.eval()
+    return model
+
 
 # -------------------------
-# LOAD STATE DICT
+# LAZY SINGLETON + WARMUP
 # -------------------------
-state_dict = torch.load(MODEL_PATH, map_location=device)
-model.load_state_dict(state_dict)
-model.to(device)
-model.eval()
+_predictor = None
+_load_error = None
+_loading = False
+_load_lock = threading.Lock()
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+def get_predictor() -> Predictor:
+    """
+    The process-wide Predictor, loading it on first use.
+
+    If a warmup is already loading it, waits for that load instead of
+    starting a second one. Raises RuntimeError if loading failed.
+    """
+    global _predictor, _load_error, _loading
+    if _predictor is not None:
+        return _predictor
+    with _load_lock:
+        if _predictor is None and _load_error is None:
+            _loading = True
+            try:
+                _predictor = Predictor()
+            except Exception as e:
+                _load_error = e
+            finally:
+                _loading = False
+    if _load_error is not None:
+        raise RuntimeError("Ingredient recognition model failed to load") from _load_error
+    return _predictor
+
+
+def start_warmup() -> None:
+    """Start loading the model on a daemon thread (once per process)."""
+    global _warmup_thread
+    # its own lock: a page calling this must never wait on an ongoing load
+    with _warmup_lock:
+        if _warmup_thread is not None or _predictor is not None:
+            return
+        _warmup_thread = threading.Thread(
+            target=_warmup, name="model-warmup", daemon=True
+        )
+        _warmup_thread.start()
+
+
+def _warmup() -> None:
+    try:
+        get_predictor()
+        # hashes the weights, so the first upload doesn't have to
+        prediction_cache()
+    except RuntimeError:
+        # surfaced through model_status() / model_error()
+        pass
+
+
+def model_status() -> str:
+    """One of "idle", "loading", "ready" or "failed", for the UI."""
+    if _predictor is not None:
+        return "ready"
+    if _load_error is not None:
+        return "failed"
+    if _loading or (_warmup_thread is not None and _warmup_thread.is_alive()):
+        return "loading"
+    return "idle"
+
+
+def model_error() -> Exception | None:
+    """Why loading failed, if it did."""
+    return _load_error
+
 
 # -------------------------
-# IMAGE TRANSFORM (same as training)
+# INFERENCE SERVER
 # -------------------------
-IMG_SIZE = 224
-test_transform = transforms.Compose([
-    transforms.Lambda(lambda img: img.convert("RGB")),
-    transforms.Resize((IMG_SIZE, IMG_SIZE)),
-    transforms.CenterCrop(IMG_SIZE),
-    transforms.ToTensor(),
-    transforms.Normalize(
-        (0.485, 0.456, 0.406),
-        (0.229, 0.224, 0.225),
-    ),
-])
+_server = None
+_server_lock = threading.Lock()
+
+
+def _run_batch(arrays: List[np.ndarray]) -> List[str]:
+    # one batch of at most PREDICT_BATCH_SIZE, on the server thread
+    return get_predictor().predict_arrays(arrays, batch_size=len(arrays))
+
+
+def inference_server() -> InferenceServer:
+    """The process-wide micro-batching server every session classifies through."""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = InferenceServer(
+                    _run_batch,
+                    max_batch_size=PREDICT_BATCH_SIZE,
+                    max_wait_ms=BATCH_MAX_WAIT_MS,
+                    max_queue=INFERENCE_QUEUE_SIZE,
+                ).start()
+    return _server
+
+
+def classify_arrays(arrays: List[np.ndarray]) -> List[str]:
+    """
+    Labels for preprocessed inputs via the shared server, in input order.
+    Raises QueueFull when too many requests are already waiting, and
+    TimeoutError after INFERENCE_TIMEOUT_S.
+    """
+    if not arrays:
+        return []
+    return inference_server().classify(arrays, result_timeout=INFERENCE_TIMEOUT_S)
+
 
 # -------------------------
 # PREDICT
 # -------------------------
 def predict_image(image: Image.Image) -> str:
-    img = image.convert("RGB")
-    x = test_transform(img).unsqueeze(0).to(device)
+    return classify_arrays([to_model_input(image)])[0]
+
+
+def predict_images(images: List[Image.Image]) -> List[str]:
+    """
+    Labels for many images at once, in input order.
+
+    They go through the shared inference server, which batches them
+    (with other sessions' photos) up to PREDICT_BATCH_SIZE per forward
+    pass, so ten photos cost one or two forward passes instead of ten.
+    """
+    return classify_arrays([to_model_input(img) for img in images])
+
+
+def __getattr__(name):
+    # model / device / test_transform used to be module globals built at
+    # import time; keep them reachable, loading the model on demand
+    attrs = {"model": "model", "device": "device", "test_transform": "transform"}
+    if name in attrs:
+        return getattr(get_predictor(), attrs[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# -------------------------
+# PREDICTION CACHE
+# -------------------------
+_cache = None
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _model_tag() -> str:
+    """Hash of the weights + label map: a new model never reuses old predictions."""
+    h = hashlib.sha256()
+    try:
+        h.update(file_digest(MODEL_PATH).encode())
+    except OSError:
+        h.update(b"no-weights")
+    h.update(json.dumps(labels).encode())
+    return h.hexdigest()[:16]
+
+
+def prediction_cache() -> PredictionCache:
+    """The process-wide prediction cache for the current model."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                # quantized backends may disagree with eager on a few images
+                _cache = PredictionCache(
+                    f"{_model_tag()}-{INFERENCE_BACKEND}",
+                    db_path=PREDICTION_DB_PATH or None,
+                )
+    return _cache
+
+
+def predict_image_bytes(
+    datas: List[bytes],
+    prepared: List[Prepared | None] | None = None,
+) -> List[str | None]:
+    """
+    Labels for encoded image files, in input order, via the prediction cache.
+
+    Files are looked up by content hash; only ones this model has never
+    seen are sent to the inference server. Pass `prepared` (from
+    image_preprocess.prepare_many, e.g. when thumbnails were made anyway)
+    to skip decoding; otherwise misses are decoded on the preprocessing
+    pool. Undecodable files get None. On QueueFull, its `partial` holds
+    the labels known so far, one per file (None for the rest).
+    """
+    cache = prediction_cache()
+    digests = [bytes_digest(data) for data in datas]
+    known = cache.get_many(digests)
 
-    with torch.no_grad():
-        outputs = model(x)
-        pred_idx = outputs.argmax(1).item()
+    todo = {}  # digest -> position of its first file; duplicates run once
+    for i, digest in enumerate(digests):
+        if digest not in known and digest not in todo:
+            todo[digest] = i
+    if not todo:
+        return [known.get(digest) for digest in digests]
 
-    return labels[pred_idx]
+    if prepared is None:
+        ready = prepare_many([datas[i] for i in todo.values()], thumb_size=None)
+    else:
+        ready = [prepared[i] for i in todo.values()]
+    arrays = {d: p.array for d, p in zip(todo, ready) if p is not None}
+    if arrays:
+        try:
+            preds = classify_arrays(list(arrays.values()))
+        except QueueFull as e:
+            # keep what the cache and the chunks that got through know
+            fresh = dict(zip(arrays, e.partial))
+            cache.put_many(fresh)
+            known.update(fresh)
+            raise QueueFull(str(e), partial=[known.get(d) for d in digests]) from None
+        fresh = dict(zip(arrays, preds))
+        cache.put_many(fresh)
+        known.update(fresh)
+    return [known.get(digest) for digest in digests]
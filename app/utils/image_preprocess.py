@@ -0,0 +1,110 @@
+# app/utils/image_preprocess.py
+"""
+One decode per uploaded photo: the model input and a display thumbnail.
+
+A 12 MP phone JPEG is never decoded at full size. draft() asks the JPEG
+decoder for the smallest 1/2, 1/4 or 1/8 scale that still covers
+DECODE_SIZE, then the EXIF orientation is applied and both outputs come
+from that one small image. PIL releases the GIL while decoding and
+resizing, so batches are prepared on a thread pool.
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+import numpy as np
+from PIL import Image, ImageOps
+
+IMG_SIZE = 224
+# Long side of the display thumbnail; the uploader shows photos two per
+# row, so 512px stays sharp without shipping megapixels to the browser
+THUMB_SIZE = 512
+# Every decode targets this size, with or without a thumbnail: the model
+# input (and so the cached label) of a file must not depend on the caller
+DECODE_SIZE = 512
+THUMB_QUALITY = 85
+
+# ImageNet normalisation the model was trained with
+MEAN = np.array((0.485, 0.456, 0.406), dtype=np.float32)
+STD = np.array((0.229, 0.224, 0.225), dtype=np.float32)
+
+PREPROCESS_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class Prepared:
+    """A decoded upload: normalised CHW float32 model input + JPEG thumbnail bytes."""
+
+    __slots__ = ("array", "thumbnail")
+
+    def __init__(self, array: np.ndarray, thumbnail: bytes | None):
+        self.array = array
+        self.thumbnail = thumbnail
+
+
+def to_model_input(img: Image.Image) -> np.ndarray:
+    """
+    3 x IMG_SIZE x IMG_SIZE float32, normalised. Matches the training
+    transform (bilinear Resize to a square, ToTensor, Normalize).
+    """
+    img = img.convert("RGB").resize((IMG_SIZE, IMG_SIZE), Image.BILINEAR)
+    x = np.asarray(img, dtype=np.float32) / 255.0
+    return np.ascontiguousarray(((x - MEAN) / STD).transpose(2, 0, 1))
+
+
+def decode(data: bytes) -> Image.Image:
+    """Decode to at least DECODE_SIZE on each side (if larger), upright per EXIF, in RGB."""
+    img = Image.open(io.BytesIO(data))
+    # JPEG only (a no-op for other formats); must come before load()
+    img.draft("RGB", (DECODE_SIZE, DECODE_SIZE))
+    img = ImageOps.exif_transpose(img)
+    return img.convert("RGB")
+
+
+def prepare(data: bytes, thumb_size: int | None = THUMB_SIZE) -> Prepared:
+    """
+    Model input and (unless `thumb_size` is None) a thumbnail from one
+    decode (DECODE_SIZE or more per side for large photos; never upscaled).
+    """
+    img = decode(data)
+    thumbnail = None
+    if thumb_size:
+        thumb = img.copy()
+        thumb.thumbnail((thumb_size, thumb_size))
+        buf = io.BytesIO()
+        thumb.save(buf, format="JPEG", quality=THUMB_QUALITY)
+        thumbnail = buf.getvalue()
+    return Prepared(to_model_input(img), thumbnail)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """One pool shared by every session."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(PREPROCESS_WORKERS, thread_name_prefix="preprocess")
+    return _pool
+
+
+def _prepare_or_none(data: bytes, thumb_size: int | None) -> Prepared | None:
+    try:
+        return prepare(data, thumb_size)
+    except Exception:
+        return None
+
+
+def prepare_many(
+    datas: List[bytes],
+    thumb_size: int | None = THUMB_SIZE,
+) -> List[Prepared | None]:
+    """prepare() for every file on the thread pool, in input order; None if undecodable."""
+    if len(datas) <= 1:
+        return [_prepare_or_none(d, thumb_size) for d in datas]
+    return list(_get_pool().map(lambda d: _prepare_or_none(d, thumb_size), datas))
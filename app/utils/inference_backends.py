@@ -0,0 +1,260 @@
+# app/utils/inference_backends.py
+"""
+Interchangeable CPU inference backends for the food recognition model.
+
+    eager        float32 PyTorch (the reference)
+    torchscript  traced + frozen TorchScript, optimized for inference
+    onnx         ONNX export run by an ONNX Runtime CPU session
+    onnx-int8    the ONNX export with int8 (dynamically quantized) weights
+
+image_predict picks one with PANTRYPAL_INFERENCE_BACKEND (default
+"eager"); the onnx backends need `pip install onnx onnxruntime`. Exports
+are cached under data/cache/models/, keyed by the model tag, so they are
+rebuilt only when the weights change.
+
+Check a backend's top-1 agreement with eager before switching to it:
+
+    cd app && python -m utils.inference_backends onnx-int8 photos/*.jpg
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+from pathlib import Path
+from typing import Callable, Dict, List
+import numpy as np
+
+BACKENDS = ("eager", "torchscript", "onnx", "onnx-int8")
+# Modules each backend needs on top of torch / timm
+REQUIRES = {
+    "eager": (),
+    "torchscript": (),
+    "onnx": ("onnx", "onnxruntime"),
+    "onnx-int8": ("onnx", "onnxruntime"),
+}
+
+BASE_DIR = os.path.dirname(__file__)
+MODEL_CACHE_DIR = Path(BASE_DIR, "..", "..", "data", "cache", "models").resolve()
+
+IMG_SIZE = 224
+
+
+class EagerBackend:
+    """The float32 PyTorch module as trained."""
+
+    name = "eager"
+
+    def __init__(self, model, device: str):
+        import torch
+
+        self.torch = torch
+        self.model = model
+        self.device = device
+
+    def __call__(self, x) -> np.ndarray:
+        with self.torch.inference_mode():
+            return self.model(x.to(self.device)).float().cpu().numpy()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(p.numel() * p.element_size() for p in self.model.parameters())
+
+
+class TorchScriptBackend:
+    """Traced, frozen TorchScript module (conv+bn folded, CPU only)."""
+
+    name = "torchscript"
+
+    def __init__(self, path: Path, model_factory: Callable):
+        import torch
+
+        self.torch = torch
+        if not path.exists():
+            model = model_factory("cpu")
+            example = torch.zeros(1, 3, IMG_SIZE, IMG_SIZE)
+            with torch.inference_mode():
+                frozen = torch.jit.freeze(torch.jit.trace(model, example).eval())
+            _save_atomic(path, lambda tmp: torch.jit.save(frozen, str(tmp)))
+        # optimize after loading: its rewrites are specific to this machine
+        self.module = torch.jit.optimize_for_inference(torch.jit.load(str(path)).eval())
+        self.path = path
+
+    def __call__(self, x) -> np.ndarray:
+        with self.torch.inference_mode():
+            return self.module(x.cpu()).float().numpy()
+
+    @property
+    def nbytes(self) -> int:
+        return self.path.stat().st_size
+
+
+class OnnxBackend:
+    """An ONNX export of the model run by an ONNX Runtime CPU session."""
+
+    name = "onnx"
+
+    def __init__(self, path: Path, model_factory: Callable, int8: bool = False):
+        import onnxruntime as ort
+
+        fp32_path = path.with_name(path.name.replace("-int8", ""))
+        if not fp32_path.exists():
+            _export_onnx(model_factory("cpu"), fp32_path)
+        if int8:
+            self.name = "onnx-int8"
+            if not path.exists():
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+
+                # uint8 weights: ConvInteger has no int8-weight CPU kernel
+                _save_atomic(path, lambda tmp: quantize_dynamic(
+                    str(fp32_path), str(tmp), weight_type=QuantType.QUInt8
+                ))
+        else:
+            path = fp32_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            str(path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.path = path
+
+    def __call__(self, x) -> np.ndarray:
+        batch = np.ascontiguousarray(x.cpu().numpy(), dtype=np.float32)
+        return self.session.run(None, {self.input_name: batch})[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.path.stat().st_size
+
+
+def missing_modules(name: str) -> List[str]:
+    """Modules backend `name` needs that aren't installed (without importing them)."""
+    return [m for m in REQUIRES[name] if importlib.util.find_spec(m) is None]
+
+
+def load_backend(
+    name: str,
+    model_factory: Callable,
+    device: str,
+    model_tag: str,
+    cache_dir: Path = MODEL_CACHE_DIR,
+):
+    """
+    Build backend `name`. `model_factory(device)` returns the eager model;
+    exported backends only call it when their cached export is missing.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r}; expected one of {BACKENDS}")
+    if name == "eager":
+        return EagerBackend(model_factory(device), device)
+    if name == "torchscript":
+        return TorchScriptBackend(cache_dir / f"{model_tag}.ts", model_factory)
+    suffix = "-int8" if name == "onnx-int8" else ""
+    return OnnxBackend(cache_dir / f"{model_tag}{suffix}.onnx", model_factory, int8=bool(suffix))
+
+
+def _export_onnx(model, path: Path) -> None:
+    import inspect
+    import torch
+
+    options = {}
+    # Recent torch defaults to the dynamo exporter, which needs onnxscript
+    # and handles dynamic_axes / opset_version differently; keep the
+    # TorchScript exporter (older torch has no `dynamo` argument at all)
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        options["dynamo"] = False
+    example = torch.zeros(1, 3, IMG_SIZE, IMG_SIZE)
+    _save_atomic(path, lambda tmp: torch.onnx.export(
+        model, example, str(tmp),
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+        **options,
+    ))
+
+
+def _save_atomic(path: Path, write: Callable[[Path], object]) -> None:
+    """Run `write(tmp)` then rename, so readers never see half a model."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+# -------------------------
+# PARITY CHECK
+# -------------------------
+def check_parity(
+    images: List,
+    backend: str,
+    batch_size: int = 16,
+) -> Dict:
+    """
+    Top-1 agreement of `backend` with eager over sample images, plus
+    per-image latency and model size of both.
+    """
+    import time
+    from utils.image_predict import Predictor
+
+    report: Dict = {"backend": backend, "images": len(images)}
+    preds = {}
+    for name in ("eager", backend):
+        predictor = Predictor(backend=name)
+        if predictor.backend.name != name:
+            raise RuntimeError(f"Built backend {predictor.backend.name!r}, not {name!r}")
+        predictor.predict_batch(images[:batch_size], batch_size=batch_size)  # warm up
+        t = time.perf_counter()
+        preds[name] = predictor.predict_batch(images, batch_size=batch_size)
+        elapsed = time.perf_counter() - t
+        key = "eager" if name == "eager" else "backend"
+        report[f"{key}_ms_per_image"] = 1e3 * elapsed / max(len(images), 1)
+        report[f"{key}_model_bytes"] = predictor.backend.nbytes
+
+    mismatches = [
+        {"index": i, "eager": a, "backend": b}
+        for i, (a, b) in enumerate(zip(preds["eager"], preds[backend]))
+        if a != b
+    ]
+    report["top1_agreement"] = 1.0 - len(mismatches) / max(len(images), 1)
+    report["mismatches"] = mismatches
+    return report
+
+
+def main() -> None:
+    import argparse
+    import json
+    import sys
+    from PIL import Image
+
+    parser = argparse.ArgumentParser(
+        description="Compare an inference backend's top-1 with eager PyTorch."
+    )
+    parser.add_argument("backend", choices=[b for b in BACKENDS if b != "eager"])
+    parser.add_argument("images", nargs="+", help="sample image files")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="exit non-zero below this top-1 agreement")
+    args = parser.parse_args()
+    missing = missing_modules(args.backend)
+    if missing:
+        parser.error(f"backend {args.backend!r} needs {', '.join(missing)} installed")
+
+    images = []
+    for p in args.images:
+        with Image.open(p) as img:
+            images.append(img.convert("RGB"))
+
+    report = check_parity(images, args.backend, batch_size=args.batch_size)
+    print(json.dumps(report, indent=2))
+    if report["top1_agreement"] < args.min_agreement:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# app/utils/inference_server.py
+"""
+In-process micro-batching for image classification.
+
+Every Streamlit session submits preprocessed inputs to one shared queue.
+A single worker thread owns the model: it takes the oldest request,
+waits at most `max_wait_ms` for more to arrive, and runs up to
+`max_batch_size` of them in one forward pass. Concurrent uploads
+therefore share batches instead of fighting over the intra-op thread
+pool at batch size 1. A full queue rejects new work (QueueFull)
+rather than letting latency grow without bound.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List
+import numpy as np
+
+_STOP = object()
+
+
+class QueueFull(RuntimeError):
+    """
+    The inference queue stayed full for the whole submit timeout.
+    `partial` holds the results already obtained, for a prefix of the inputs.
+    """
+
+    def __init__(self, message: str, partial: List | None = None):
+        super().__init__(message)
+        self.partial = list(partial or [])
+
+
+class InferenceServer:
+    """
+    Batches requests from any thread into calls of `run_batch(arrays)`,
+    which must return one result per input, in order.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[np.ndarray]], List],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        max_queue: int = 256,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1e3
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    # ---------------- lifecycle ----------------
+    def start(self) -> "InferenceServer":
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="inference-server", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Finish what's queued, then stop the worker."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    # ---------------- client side ----------------
+    def submit(self, array: np.ndarray, timeout: float | None = 1.0) -> Future:
+        """
+        Queue one input; its Future resolves to the label. Waits up to
+        `timeout` seconds for queue space, then raises QueueFull.
+        """
+        return self.submit_many([array], timeout)[0]
+
+    def submit_many(self, arrays: List[np.ndarray], timeout: float | None = 1.0) -> List[Future]:
+        """
+        submit() for several inputs, all or nothing: if the queue fills
+        part way, the ones already queued are cancelled and QueueFull raised.
+        """
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        futures: List[Future] = []
+        for array in arrays:
+            fut: Future = Future()
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                self._queue.put((array, fut), timeout=left)
+            except queue.Full:
+                for queued in futures:
+                    queued.cancel()
+                with self._lock:
+                    self.rejected += 1
+                raise QueueFull(
+                    f"Inference queue full ({self._queue.maxsize} waiting)"
+                ) from None
+            futures.append(fut)
+        return futures
+
+    def classify(
+        self,
+        arrays: List[np.ndarray],
+        timeout: float | None = 1.0,
+        result_timeout: float | None = None,
+    ) -> List:
+        """
+        Submit `arrays` and wait for all their results, in order.
+
+        Inputs go in chunks of max_batch_size, each once the previous one
+        is done, so one caller holds at most a batch of queue slots and
+        any number of inputs fits. Raises QueueFull (results so far in
+        `partial`) if a chunk can't be queued within `timeout`, and
+        concurrent.futures.TimeoutError if results take more than
+        `result_timeout` seconds in total.
+        """
+        deadline = None if result_timeout is None else time.monotonic() + result_timeout
+        results: List = []
+        for start in range(0, len(arrays), self.max_batch_size):
+            try:
+                futures = self.submit_many(arrays[start:start + self.max_batch_size], timeout)
+            except QueueFull as e:
+                raise QueueFull(str(e), partial=results) from None
+            try:
+                for fut in futures:
+                    left = None if deadline is None else max(0.0, deadline - time.monotonic())
+                    results.append(fut.result(left))
+            except FutureTimeout:
+                for fut in futures:
+                    fut.cancel()
+                raise
+        return results
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "queued": self._queue.qsize(),
+                "rejected": self.rejected,
+            }
+
+    # ---------------- worker ----------------
+    def _loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                left = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=left) if left > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch) -> None:
+        # drop requests cancelled while queued (see submit_many)
+        batch = [(a, f) for a, f in batch if f.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = list(self.run_batch([a for a, _ in batch]))
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"run_batch returned {len(results)} results for {len(batch)} inputs"
+                )
+        except Exception as e:   # a failed batch fails its requests, not the worker
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), result in zip(batch, results):
+            fut.set_result(result)
+        with self._lock:
+            self.batches += 1
+            self.items += len(batch)
@@ -0,0 +1,142 @@
+# app/utils/prediction_cache.py
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable
+
+
+def bytes_digest(data: bytes) -> str:
+    """Content address of an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: str | Path) -> str:
+    """Hex sha256 of a file's contents, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PredictionCache:
+    """
+    Image digest -> predicted label, for one model version.
+
+    An in-process LRU sits in front of an optional SQLite file that
+    outlives the process, so a photo seen by any session (or before a
+    restart) costs a hash instead of a forward pass. Every entry is
+    tagged with `model_tag` (a hash of the weights + labels, and the
+    backend), so processes running other models can share the file;
+    only the newest `max_db_entries` rows are kept.
+    """
+
+    def __init__(
+        self,
+        model_tag: str,
+        max_entries: int = 4096,
+        db_path: str | Path | None = None,
+        max_db_entries: int = 100_000,
+    ):
+        self.model_tag = model_tag
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._db = None
+        if db_path is not None:
+            try:
+                self._db = self._open_db(Path(db_path), max_db_entries)
+            except (OSError, sqlite3.Error):
+                # read-only / full disk: memory-only cache still works
+                self._db = None
+
+    def _open_db(self, path: Path, max_db_entries: int) -> sqlite3.Connection:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # shared by Streamlit's session threads; every use holds self._lock
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " model TEXT NOT NULL, digest TEXT NOT NULL, label TEXT NOT NULL,"
+            " PRIMARY KEY (model, digest))"
+        )
+        # keep the newest max_db_entries rows (rowid grows with each insert)
+        db.execute(
+            "DELETE FROM predictions WHERE rowid <= "
+            "(SELECT MAX(rowid) FROM predictions) - ?",
+            (max_db_entries,),
+        )
+        db.commit()
+        return db
+
+    def get_many(self, digests: Iterable[str]) -> Dict[str, str]:
+        """Cached labels for whichever of `digests` are known."""
+        found: Dict[str, str] = {}
+        with self._lock:
+            missing = []
+            for d in digests:
+                label = self._lru.get(d)
+                if label is None:
+                    missing.append(d)
+                else:
+                    self._lru.move_to_end(d)
+                    found[d] = label
+                    self.hits += 1
+
+            if missing and self._db is not None:
+                marks = ",".join("?" * len(missing))
+                try:
+                    rows = self._db.execute(
+                        f"SELECT digest, label FROM predictions"
+                        f" WHERE model = ? AND digest IN ({marks})",
+                        (self.model_tag, *missing),
+                    ).fetchall()
+                except sqlite3.Error:
+                    rows = []
+                for d, label in rows:
+                    found[d] = label
+                    self._remember(d, label)
+                    self.disk_hits += 1
+            self.misses += sum(1 for d in missing if d not in found)
+        return found
+
+    def put_many(self, labels: Dict[str, str]) -> None:
+        if not labels:
+            return
+        with self._lock:
+            for d, label in labels.items():
+                self._remember(d, label)
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO predictions (model, digest, label)"
+                        " VALUES (?, ?, ?)",
+                        [(self.model_tag, d, label) for d, label in labels.items()],
+                    )
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._lru),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
+
+    def _remember(self, digest: str, label: str) -> None:
+        self._lru[digest] = label
+        self._lru.move_to_end(digest)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
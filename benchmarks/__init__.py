@@ -0,0 +1,8 @@
+"""
+Benchmarks for the recipe search engine.
+
+- synthetic_catalog: writes recipes.csv files with the real schema at
+  1k / 10k / 100k / 1M rows
+- bench_search: cold load, warm query, batch and memory benchmarks with
+  JSON output, e.g. `python -m benchmarks.bench_search --sizes 1k,10k`
+"""
@@ -0,0 +1,276 @@
+# benchmarks/bench_search.py
+"""
+Latency / memory benchmarks for scripts.recipe_search.
+
+For each catalog size (synthetic, see synthetic_catalog):
+  - cold_load:   CSV parse (+ artifact write), then artifact load
+  - warm_query:  match_recipes latency percentiles, uncached / filtered /
+                 result-cache hit
+  - batch:       match_recipes_batch vs. a loop of single queries
+  - memory:      tracemalloc peak while parsing, and resident bytes of
+                 the loaded frame + index, per recipe
+
+Results are printed (or written with --out) as JSON; --baseline prints
+how each metric changed against an earlier run.
+
+    python -m benchmarks.bench_search --sizes 1k,10k --out bench.json
+    python -m benchmarks.bench_search --sizes 1k,10k --baseline bench.json
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_catalog import SIZES, catalog_path
+import scripts.recipe_search as rs
+
+# Bump when a metric's meaning changes, so old runs are not compared to it
+SCHEMA_VERSION = 1
+
+
+def _percentiles(seconds: List[float]) -> Dict[str, float]:
+    ms = np.asarray(seconds) * 1e3
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def sample_pantries(df: pd.DataFrame, n: int, seed: int = 0) -> List[List[str]]:
+    """
+    Pantries of 2-8 cores, drawn by how many recipes use each core, so
+    popular ingredients dominate like they do in real pantries.
+    """
+    index = rs._get_index(df)
+    popularity = np.diff(index.postings.indptr).astype(np.float64)
+    popularity /= popularity.sum()
+    rng = np.random.default_rng(seed)
+    pantries = []
+    for _ in range(n):
+        k = min(int(rng.integers(2, 9)), int((popularity > 0).sum()))
+        ids = rng.choice(len(index.vocab), size=k, replace=False, p=popularity)
+        pantries.append([index.vocab[j] for j in ids])
+    return pantries
+
+
+def bench_cold_load(csv: Path) -> Dict[str, float]:
+    """Parse + artifact write, then artifact load, in a scratch ARTIFACT_DIR."""
+    saved = rs.ARTIFACT_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        rs.ARTIFACT_DIR = Path(tmp)
+        try:
+            rs._cached_core.cache_clear()
+            t = time.perf_counter()
+            rs.load_recipes(csv)
+            parse_s = time.perf_counter() - t
+
+            t = time.perf_counter()
+            rs.load_recipes(csv)
+            artifact_s = time.perf_counter() - t
+        finally:
+            rs.ARTIFACT_DIR = saved
+    return {"parse_s": parse_s, "artifact_load_s": artifact_s}
+
+
+def bench_warm_query(
+    df: pd.DataFrame,
+    pantries: List[List[str]],
+    repeats: int = 3,
+) -> Dict[str, Dict[str, float]]:
+    """match_recipes latency once the catalog, caches and indexes are warm."""
+    for ings in pantries:
+        rs.match_recipes(ings, df, use_cache=False)
+
+    def timed(**kwargs) -> List[float]:
+        seconds = []
+        for _ in range(repeats):
+            for ings in pantries:
+                t = time.perf_counter()
+                rs.match_recipes(ings, df, **kwargs)
+                seconds.append(time.perf_counter() - t)
+        return seconds
+
+    rs.RESULT_CACHE.clear()
+    for ings in pantries:
+        rs.match_recipes(ings, df)
+    return {
+        "uncached": _percentiles(timed(use_cache=False)),
+        "filtered": _percentiles(timed(use_cache=False, filters={"max_minutes": 30})),
+        "cache_hit": _percentiles(timed()),
+    }
+
+
+def bench_batch(df: pd.DataFrame, pantries: List[List[str]]) -> Dict[str, float]:
+    """One match_recipes_batch call vs. the same pantries one by one."""
+    t = time.perf_counter()
+    rs.match_recipes_batch(pantries, df)
+    batch_s = time.perf_counter() - t
+
+    t = time.perf_counter()
+    for ings in pantries:
+        rs.match_recipes(ings, df, use_cache=False)
+    loop_s = time.perf_counter() - t
+    return {
+        "pantries": len(pantries),
+        "batch_s": batch_s,
+        "loop_s": loop_s,
+        "batch_queries_per_s": len(pantries) / batch_s,
+        "speedup": loop_s / batch_s,
+    }
+
+
+def _index_bytes(index: rs.IngredientIndex) -> int:
+    return sum(
+        M.data.nbytes + M.indices.nbytes + M.indptr.nbytes
+        for M in (index.matrix, index.postings)
+    )
+
+
+def bench_memory(csv: Path) -> Dict[str, float]:
+    """Peak allocations while parsing and resident size after, per recipe."""
+    rs._cached_core.cache_clear()
+    tracemalloc.start()
+    try:
+        df = rs.load_recipes(csv, use_artifact=False)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    n = len(df)
+    frame = int(df.memory_usage(deep=True).sum())
+    index = _index_bytes(rs._get_index(df))
+    return {
+        "parse_peak_bytes_per_recipe": peak / n,
+        "frame_bytes_per_recipe": frame / n,
+        "index_bytes_per_recipe": index / n,
+        "resident_bytes_per_recipe": (frame + index) / n,
+    }
+
+
+def run_size(size: str, n_queries: int = 200, seed: int = 0, memory: bool = True) -> Dict:
+    """Every benchmark on the synthetic catalog of one size."""
+    csv = catalog_path(size, seed=seed)
+    result: Dict = {"size": size, "rows": SIZES[size]}
+    result["cold_load"] = bench_cold_load(csv)
+
+    df = rs.load_recipes(csv, use_artifact=False)
+    index = rs._get_index(df)
+    result["vocab"] = len(index.vocab)
+    pantries = sample_pantries(df, n_queries, seed=seed)
+    result["warm_query"] = bench_warm_query(df, pantries)
+    result["batch"] = bench_batch(df, pantries)
+    if memory:
+        del df
+        result["memory"] = bench_memory(csv)
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=rs.BASE_DIR,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _metadata(seed: int, n_queries: int) -> Dict:
+    return {
+        "schema": SCHEMA_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "queries": n_queries,
+        "parser_version": rs.PARSER_VERSION,
+        "engine_version": rs.ENGINE_VERSION,
+    }
+
+
+def _flatten(tree: Dict, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(baseline: Dict, current: Dict) -> List[str]:
+    """One "metric: old -> new (ratio)" line per metric both runs have."""
+    if baseline.get("meta", {}).get("schema") != current["meta"]["schema"]:
+        return ["baseline has a different schema version; not comparable"]
+    old = {r["size"]: _flatten(r) for r in baseline["runs"]}
+    lines = []
+    for run in current["runs"]:
+        if run["size"] not in old:
+            continue
+        before = old[run["size"]]
+        for name, value in _flatten(run).items():
+            if name in before and before[name]:
+                lines.append(
+                    f"{run['size']:>5} {name}: {before[name]:.4g} -> {value:.4g}"
+                    f" (x{value / before[name]:.2f})"
+                )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the recipe search engine.")
+    parser.add_argument("--sizes", default="1k,10k",
+                        help=f"comma-separated, any of {','.join(SIZES)}")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the (slow, tracemalloc) memory benchmark")
+    parser.add_argument("--out", default=None, help="write JSON here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="earlier JSON run to compare to")
+    args = parser.parse_args()
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s) {unknown}; expected some of {list(SIZES)}")
+
+    report = {
+        "meta": _metadata(args.seed, args.queries),
+        "runs": [
+            run_size(s, n_queries=args.queries, seed=args.seed, memory=not args.no_memory)
+            for s in sizes
+        ],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\n".join(compare(baseline, report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
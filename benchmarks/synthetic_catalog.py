@@ -0,0 +1,247 @@
+# benchmarks/synthetic_catalog.py
+"""
+Synthetic recipes.csv generator with the real catalog's schema.
+
+Ingredient, nutrition and timing cells use the same string formats as
+data/raw/recipes.csv, so the full parsing path is exercised. Ingredient
+popularity is Zipf-distributed, and the vocabulary grows with the
+catalog (about 16 * sqrt(rows) cores, close to the real data's 513 for
+1090 rows).
+
+    python -m benchmarks.synthetic_catalog --size 100k
+"""
+from __future__ import annotations
+import argparse
+from pathlib import Path
+from typing import List
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+BENCH_DIR = BASE_DIR / "data" / "bench"
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Column order of data/raw/recipes.csv (after its unnamed index column)
+COLUMNS = [
+    "recipe_name", "prep_time", "cook_time", "total_time", "servings",
+    "yield", "ingredients", "directions", "rating", "url", "cuisine_path",
+    "nutrition", "timing", "img_src",
+]
+
+# Most popular cores are real ingredients; the long tail is made-up words
+HEAD_INGREDIENTS = [
+    "butter", "egg", "garlic", "onion", "milk", "cream", "cheese", "lemon",
+    "chicken", "tomato", "cinnamon", "vanilla", "parsley", "carrot", "celery",
+    "potato", "rice", "beef", "bacon", "honey", "basil", "thyme", "oregano",
+    "nutmeg", "ginger", "mushroom", "spinach", "walnut", "pecan", "almond",
+    "apple", "banana", "strawberry", "blueberry", "raisin", "oat", "yogurt",
+    "mayonnaise", "mustard", "vinegar", "cilantro", "lime", "avocado", "corn",
+    "bean", "chickpea", "lentil", "pasta", "noodle", "bread", "tortilla",
+    "salmon", "shrimp", "tuna", "pork", "turkey", "sausage", "ham", "zucchini",
+    "cucumber", "cabbage", "broccoli", "cauliflower", "pumpkin", "squash",
+    "peach", "pear", "cherry", "cranberry", "coconut", "chocolate", "cocoa",
+    "caramel", "molasses", "paprika", "cumin", "rosemary", "sage", "dill",
+    "chive", "scallion", "shallot", "leek", "asparagus", "eggplant", "olive",
+    "parmesan", "mozzarella", "cheddar", "ricotta", "feta", "tofu", "quinoa",
+    "couscous", "barley", "pineapple", "mango", "orange", "grapefruit",
+    "cornstarch", "gelatin", "marshmallow", "pistachio", "hazelnut", "peanut",
+]
+
+QUANTITIES = ["1", "2", "3", "4", "½", "¼", "¾", "1 ½", "1/2", "8"]
+UNITS = ["cup", "cups", "tablespoons", "tablespoon", "teaspoon", "teaspoons",
+         "ounces", "pound", "pounds", ""]
+PREPS = ["", "", "chopped", "minced", "sliced", "diced", "fresh", "grated",
+         "shredded", "melted"]
+TITLE_SUFFIXES = ["Bake", "Salad", "Soup", "Pie", "Casserole", "Stir-Fry",
+                  "Muffins", "Skillet", "Tacos", "Bars", "Roast", "Stew"]
+CUISINES = [
+    "/Desserts/Pies/Apple Pie Recipes/", "/Desserts/Cakes/", "/Side Dish/",
+    "/Salad/Green Salad Recipes/", "/Main Dishes/Casserole Recipes/",
+    "/Cuisine/European/Italian/", "/Cuisine/European/French/",
+    "/Cuisine/Asian/Chinese/", "/Cuisine/Latin American/Mexican/",
+    "/Breakfast and Brunch/", "/Soups, Stews and Chili Recipes/",
+    "/Appetizers and Snacks/", "/Bread/Quick Bread Recipes/",
+]
+
+_ONSETS = ["b", "c", "d", "f", "g", "k", "l", "m", "n", "p", "r", "s", "t",
+           "v", "z", "br", "ch", "gr", "pl", "st", "tr"]
+_VOWELS = ["a", "e", "i", "o", "u", "ai", "ou"]
+_CODAS = ["", "", "n", "r", "l", "m", "t"]
+
+
+def vocab_size(n_rows: int) -> int:
+    """Distinct ingredient cores for a catalog of `n_rows` recipes."""
+    return max(len(HEAD_INGREDIENTS), int(16 * n_rows ** 0.5))
+
+
+def make_vocabulary(size: int, rng: np.random.Generator) -> List[str]:
+    """HEAD_INGREDIENTS followed by unique made-up words, in popularity order."""
+    vocab = list(HEAD_INGREDIENTS[:size])
+    seen = set(vocab)
+    while len(vocab) < size:
+        n_syllables = int(rng.integers(2, 4))
+        word = "".join(
+            _ONSETS[rng.integers(len(_ONSETS))]
+            + _VOWELS[rng.integers(len(_VOWELS))]
+            + _CODAS[rng.integers(len(_CODAS))]
+            for _ in range(n_syllables)
+        )
+        # the matcher strips trailing "s" / "es": keep tail words stable
+        if word not in seen and not word.endswith("s"):
+            seen.add(word)
+            vocab.append(word)
+    return vocab
+
+
+def _duration(minutes: int) -> str:
+    """Minutes as the catalog writes them: "1 day 2 hrs 5 mins"."""
+    days, rest = divmod(int(minutes), 24 * 60)
+    hrs, mins = divmod(rest, 60)
+    parts = []
+    if days:
+        parts.append(f"{days} day" + ("s" if days > 1 else ""))
+    if hrs:
+        parts.append(f"{hrs} hrs")
+    if mins:
+        parts.append(f"{mins} mins")
+    return " ".join(parts) or "0 mins"
+
+
+def generate_chunk(
+    start: int,
+    n_rows: int,
+    vocab: List[str],
+    rng: np.random.Generator,
+    zipf_a: float = 1.1,
+) -> pd.DataFrame:
+    """Rows start .. start + n_rows of a synthetic catalog."""
+    ranks = np.arange(1, len(vocab) + 1, dtype=np.float64)
+    popularity = ranks ** -zipf_a
+    popularity /= popularity.sum()
+
+    # ~8 ingredients per recipe, like the real catalog
+    n_ings = rng.integers(3, 14, size=n_rows)
+    drawn = rng.choice(len(vocab), size=int(n_ings.sum()), p=popularity)
+    qty = rng.integers(len(QUANTITIES), size=len(drawn))
+    unit = rng.integers(len(UNITS), size=len(drawn))
+    prep = rng.integers(len(PREPS), size=len(drawn))
+
+    ingredients: List[str] = []
+    names: List[str] = []
+    pos = 0
+    for k in n_ings:
+        parts = []
+        for i in range(pos, pos + k):
+            words = [QUANTITIES[qty[i]], UNITS[unit[i]], PREPS[prep[i]], vocab[drawn[i]]]
+            parts.append(" ".join(w for w in words if w))
+        first = vocab[drawn[pos]].title()
+        names.append(f"{first} {TITLE_SUFFIXES[drawn[pos] % len(TITLE_SUFFIXES)]}")
+        ingredients.append(", ".join(parts))
+        pos += k
+
+    prep_min = rng.integers(5, 45, size=n_rows)
+    cook_min = rng.choice([0, 10, 20, 30, 45, 60, 90, 180, 480, 1500], size=n_rows)
+    total_min = prep_min + cook_min
+    servings = rng.choice([1, 2, 4, 6, 8, 10, 12, 24], size=n_rows)
+    rating = np.round(np.clip(rng.normal(4.5, 0.3, size=n_rows), 1.0, 5.0), 1)
+
+    # nutrition per serving, lognormal around typical values
+    def amount(mean: float, sigma: float = 0.8) -> np.ndarray:
+        return np.round(rng.lognormal(np.log(mean), sigma, size=n_rows)).astype(int)
+
+    fat, sat, chol, sodium = amount(15), amount(5), amount(40), amount(400)
+    carbs, fiber, sugar, protein = amount(35), amount(3), amount(12), amount(12)
+    vit_c, calcium, iron, potassium = amount(8), amount(80), amount(2), amount(300)
+
+    nutrition = [
+        f"Total Fat {fat[i]}g {fat[i] * 100 // 78}%, "
+        f"Saturated Fat {sat[i]}g {sat[i] * 100 // 20}%, "
+        f"Cholesterol {chol[i]}mg {chol[i] * 100 // 300}%, "
+        f"Sodium {sodium[i]}mg {sodium[i] * 100 // 2300}%, "
+        f"Total Carbohydrate {carbs[i]}g {carbs[i] * 100 // 275}%, "
+        f"Dietary Fiber {fiber[i]}g {fiber[i] * 100 // 28}%, "
+        f"Total Sugars {sugar[i]}g, Protein {protein[i]}g, "
+        f"Vitamin C {vit_c[i]}mg {vit_c[i] * 100 // 90}%, "
+        f"Calcium {calcium[i]}mg {calcium[i] * 100 // 1300}%, "
+        f"Iron {iron[i]}mg {iron[i] * 100 // 18}%, "
+        f"Potassium {potassium[i]}mg {potassium[i] * 100 // 4700}%"
+        for i in range(n_rows)
+    ]
+
+    prep_time = [_duration(m) for m in prep_min]
+    cook_time = [_duration(m) if m else None for m in cook_min]
+    total_time = [_duration(m) for m in total_min]
+    timing = [
+        f"Prep Time: {p}, " + (f"Cook Time: {c}, " if c else "")
+        + f"Total Time: {t}, Servings: {s}, Yield: {s} servings"
+        for p, c, t, s in zip(prep_time, cook_time, total_time, servings)
+    ]
+
+    ids = np.arange(start, start + n_rows)
+    df = pd.DataFrame({
+        "recipe_name": names,
+        "prep_time": prep_time,
+        "cook_time": cook_time,
+        "total_time": total_time,
+        "servings": servings,
+        "yield": [f"{s} servings" for s in servings],
+        "ingredients": ingredients,
+        "directions": "Combine the ingredients.\nCook until done.",
+        "rating": rating,
+        "url": [f"https://example.com/recipe/{i}/" for i in ids],
+        "cuisine_path": [CUISINES[k] for k in rng.integers(len(CUISINES), size=n_rows)],
+        "nutrition": nutrition,
+        "timing": timing,
+        "img_src": "",
+    }, index=ids)
+    return df[COLUMNS]
+
+
+def write_catalog(
+    path: str | Path,
+    n_rows: int,
+    seed: int = 0,
+    chunksize: int = 50_000,
+) -> Path:
+    """Write an `n_rows` synthetic catalog to `path` in chunks; returns the path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    vocab = make_vocabulary(vocab_size(n_rows), rng)
+
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, n_rows, chunksize):
+            chunk = generate_chunk(start, min(chunksize, n_rows - start), vocab, rng)
+            chunk.to_csv(f, header=(start == 0))
+    tmp.replace(path)
+    return path
+
+
+def catalog_path(size: str, seed: int = 0) -> Path:
+    """Where the catalog of a named size lives, generating it if needed."""
+    path = BENCH_DIR / f"recipes-{size}-seed{seed}.csv"
+    if not path.exists():
+        write_catalog(path, SIZES[size], seed=seed)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic recipes.csv.")
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k")
+    parser.add_argument("--rows", type=int, default=None,
+                        help="exact row count (overrides --size)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None,
+                        help="output CSV (default: data/bench/recipes-<size>-seed<seed>.csv)")
+    args = parser.parse_args()
+
+    n_rows = args.rows if args.rows is not None else SIZES[args.size]
+    label = args.size if args.rows is None else str(args.rows)
+    out = args.out or BENCH_DIR / f"recipes-{label}-seed{args.seed}.csv"
+    print(write_catalog(out, n_rows, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
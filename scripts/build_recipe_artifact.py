@@ -0,0 +1,37 @@
+# scripts/build_recipe_artifact.py
+"""
+Pre-build the compiled recipe artifact so app replicas skip CSV parsing.
+
+Usage (from the project root):
+    python -m scripts.build_recipe_artifact [data/raw/recipes.csv] [--chunksize N] [--workers N]
+"""
+import argparse
+
+from scripts.recipe_search import build_recipe_artifact
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("csv_path", nargs="?", default="data/raw/recipes.csv")
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="stream the CSV this many rows at a time (large catalogs)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parse ingredients on this many processes",
+    )
+    args = parser.parse_args(argv)
+
+    path = build_recipe_artifact(
+        args.csv_path, chunksize=args.chunksize, workers=args.workers
+    )
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
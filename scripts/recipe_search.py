@@ -3,12 +3,26 @@
 
 # scripts/recipe_search.py
 from __future__ import annotations
+from array import array
 from ast import literal_eval
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Iterable, Iterator, Tuple
+import hashlib
+import heapq
+import os
+import operator
 import re
+import uuid
+import weakref
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+import scipy.sparse as sp
+from rapidfuzz import fuzz, process
+
+from scripts.query_cache import QueryCache
+from scripts.search_metrics import SearchMetrics
 
 
 # -------------------------------------------------
@@ -16,6 +30,17 @@ from rapidfuzz import fuzz
 # -------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parents[1]
 
+# Same cut-off the matcher has always used for fuzzy core matches
+FUZZY_THRESHOLD = 0.82
+
+# -------------------------------------------------
+# INSTRUMENTATION
+# -------------------------------------------------
+# Stage timings ("load.*", "clean", "expand", "score", "rank", "query"),
+# per-query sizes and counters. Off unless PANTRYPAL_METRICS=1 or
+# METRICS.enable(); export with METRICS.to_prometheus() / snapshot().
+METRICS = SearchMetrics(enabled=os.environ.get("PANTRYPAL_METRICS") == "1")
+
 # -------------------------------------------------
 # INGREDIENT NORMALISATION & CLEANUP
 # -------------------------------------------------
@@ -59,12 +84,17 @@ def _normalize(s: str) -> str:
     """Lowercase + trim + collapse inner spaces."""
     return " ".join(s.lower().strip().split())
 
+_FRACTION_RE = re.compile(r"\d+\/\d+")
+_NUMBER_RE = re.compile(r"\d+")
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
 def _remove_numbers(text: str) -> str:
     """Remove integers and simple fractions like 1/2, 3/4."""
     if not isinstance(text, str):
         return ""
-    text = re.sub(r"\d+\/\d+", " ", text)   # fractions
-    text = re.sub(r"\d+", " ", text)        # whole numbers
+    text = _FRACTION_RE.sub(" ", text)   # fractions
+    text = _NUMBER_RE.sub(" ", text)     # whole numbers
     return text
 
 MEAT_TOKENS = {
@@ -75,6 +105,11 @@ MEAT_TOKENS = {
 }
 
 
+# Raw ingredient strings ("salt", "2 cloves garlic", ...) repeat thousands
+# of times across a catalog, so cleaned cores are memoized per raw string
+CORE_CACHE_SIZE = 1 << 16
+
+
 def _clean_ingredient_to_core(ing: str) -> str:
     """
     Extract the CORE ingredient name only.
@@ -86,16 +121,27 @@ def _clean_ingredient_to_core(ing: str) -> str:
       '3 cloves garlic' -> 'garlic'
     
     Returns ONE core ingredient name, not multiple variants.
+    Results are cached, see core_cache_info().
     """
     if not isinstance(ing, str):
         return ""
-    
+    return _cached_core(ing)
+
+
+def core_cache_info():
+    """Hit/miss counters and size of the ingredient -> core memo."""
+    return _cached_core.cache_info()
+
+
+@lru_cache(maxsize=CORE_CACHE_SIZE)
+def _cached_core(ing: str) -> str:
+    """Uncached body of _clean_ingredient_to_core (for str input only)."""
     ing = ing.lower()
     ing = _remove_numbers(ing)
     
     # Remove punctuation but keep spaces
-    ing = re.sub(r"[^\w\s]", " ", ing)
-    ing = re.sub(r"\s+", " ", ing).strip()
+    ing = _PUNCT_RE.sub(" ", ing)
+    ing = _SPACE_RE.sub(" ", ing).strip()
     
     tokens: List[str] = []
     for tok in ing.split():
@@ -152,27 +198,655 @@ def _pick_col(df: pd.DataFrame, candidates: List[str]) -> str | None:
             return name
     return None
 
-def _extract_grams(text: str, label: str) -> float:
-    """Extract '<number>g' after a label inside the nutrition string."""
-    if not isinstance(text, str):
-        return 0.0
-    pattern = rf"{re.escape(label)}\s+(\d+(\.\d*)?)g"
-    m = re.search(pattern, text)
-    if not m:
-        return 0.0
-    try:
-        return float(m.group(1))
-    except ValueError:
-        return 0.0
+# -------------------------------------------------
+# NUTRITION PARSING
+# -------------------------------------------------
+# Fixed nutrient panel: (column, label in the nutrition string, unit)
+NUTRIENTS = [
+    ("total_fat_g",          "Total Fat",          "g"),
+    ("saturated_fat_g",      "Saturated Fat",      "g"),
+    ("cholesterol_mg",       "Cholesterol",        "mg"),
+    ("sodium_mg",            "Sodium",             "mg"),
+    ("total_carbohydrate_g", "Total Carbohydrate", "g"),
+    ("dietary_fiber_g",      "Dietary Fiber",      "g"),
+    ("total_sugars_g",       "Total Sugars",       "g"),
+    ("protein_total_g",      "Protein",            "g"),
+    ("vitamin_c_mg",         "Vitamin C",          "mg"),
+    ("calcium_mg",           "Calcium",            "mg"),
+    ("iron_mg",              "Iron",               "mg"),
+    ("potassium_mg",         "Potassium",          "mg"),
+]
+NUTRIENT_COLS = [col for col, _, _ in NUTRIENTS]
+
+# Macro columns the matcher / health score use, and their panel source
+MACRO_SOURCES = {
+    "protein_g": "protein_total_g",
+    "fat_g":     "total_fat_g",
+    "fiber_g":   "dietary_fiber_g",
+    "sugar_g":   "total_sugars_g",
+    "carbs_g":   "total_carbohydrate_g",
+}
+
+# Every "Label <number><unit>" pair, e.g. "Total Fat 18g" or "Sodium 128mg"
+NUTRIENT_PATTERN = re.compile(
+    r"(?P<label>[A-Za-z][A-Za-z ]*?)\s+(?P<value>\d+(?:\.\d*)?)\s*(?P<unit>mcg|mg|g)\b"
+)
+_GRAMS_PER_UNIT = {"g": 1.0, "mg": 1e-3, "mcg": 1e-6}
+# (label, unit as written) -> (panel column, factor to the schema unit)
+_NUTRIENT_TARGETS = {
+    (label, written): (i, _GRAMS_PER_UNIT[written] / _GRAMS_PER_UNIT[unit])
+    for i, (_, label, unit) in enumerate(NUTRIENTS)
+    for written in _GRAMS_PER_UNIT
+}
+
+
+def _parse_nutrition(nutrition: pd.Series) -> np.ndarray:
+    """
+    Parse a nutrition string column into a (rows x NUTRIENTS) float64 matrix.
+
+    One findall per cell pulls every label/value/unit triple; values are
+    converted to the schema unit, the first occurrence of a label wins and
+    missing nutrients are 0.0. (Plain findall beats str.extractall here:
+    that builds a MultiIndex frame of every match, ~3x slower.)
+    """
+    panel = np.zeros((len(nutrition), len(NUTRIENTS)), dtype=np.float64)
+    findall = NUTRIENT_PATTERN.findall
+    targets = _NUTRIENT_TARGETS
+    for row, text in enumerate(nutrition.tolist()):
+        if not isinstance(text, str):
+            continue
+        values = panel[row]
+        # reversed, so the first occurrence is written last
+        for label, value, unit in reversed(findall(text)):
+            target = targets.get((label, unit))
+            if target is not None:
+                values[target[0]] = float(value) * target[1]
+    return panel
+
+
+def _add_nutrition_columns(out: pd.DataFrame, panel: np.ndarray) -> None:
+    """Store the panel as float32 columns plus the float64 macro columns."""
+    for col, source in MACRO_SOURCES.items():
+        out[col] = panel[:, NUTRIENT_COLS.index(source)]
+    out[NUTRIENT_COLS] = panel.astype(np.float32)
+
+
+def nutrient_matrix(df: pd.DataFrame) -> np.ndarray:
+    """Dense float32 (recipes x NUTRIENT_COLS) matrix of a loaded frame."""
+    return df[NUTRIENT_COLS].to_numpy(dtype=np.float32)
+
 
 # -------------------------------------------------
-# LOAD & PREPARE DATAFRAME
+# RECIPE FACTS (time, servings, rating, cuisine)
 # -------------------------------------------------
-def load_recipes(csv_path: str | Path) -> pd.DataFrame:
+# Numeric fact columns (float64, NaN when unknown) + the cuisine path
+FACT_COLS = ["total_minutes", "servings", "rating"]
+
+# Units of "1 day 2 hrs 20 mins" style durations, in minutes
+_DURATION_UNITS = [
+    (r"days?", 24 * 60.0),
+    (r"(?:hrs?|hours?)", 60.0),
+    (r"(?:mins?|minutes?)", 1.0),
+]
+
+
+def _parse_minutes(times: pd.Series) -> np.ndarray:
+    """Durations like "1 hrs 20 mins" as float minutes (NaN when missing)."""
+    text = times.fillna("").astype(str).str.lower()
+    total = np.zeros(len(text), dtype=np.float64)
+    found = np.zeros(len(text), dtype=bool)
+    for unit, minutes in _DURATION_UNITS:
+        n = pd.to_numeric(
+            text.str.extract(rf"(\d+(?:\.\d+)?)\s*{unit}\b", expand=False),
+            errors="coerce",
+        ).to_numpy(dtype=np.float64)
+        has = ~np.isnan(n)
+        total[has] += n[has] * minutes
+        found |= has
+    total[~found] = np.nan
+    return total
+
+
+def _timing_field(df: pd.DataFrame, label: str) -> pd.Series:
+    """One "Label: value" field of the combined timing column (NaN if absent)."""
+    if "timing" not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    return df["timing"].astype("string").str.extract(
+        rf"{label}:\s*([^,]+)", expand=False
+    ).astype(object)
+
+
+def _add_fact_columns(out: pd.DataFrame, df: pd.DataFrame) -> None:
     """
-    Loads your recipe CSV and returns a normalized DataFrame.
-    Each recipe gets a list of CORE ingredient names (one per ingredient).
+    Typed total_minutes / servings / rating / cuisine_path columns.
+
+    Dedicated CSV columns win; the combined timing string
+    ("Prep Time: ..., Total Time: ..., Servings: 8") fills their gaps.
+    """
+    def numeric(col: str) -> np.ndarray:
+        if col not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+    total = (
+        _parse_minutes(df["total_time"]) if "total_time" in df.columns
+        else np.full(len(df), np.nan)
+    )
+    total = np.where(np.isnan(total), _parse_minutes(_timing_field(df, "Total Time")), total)
+
+    servings = numeric("servings")
+    from_timing = pd.to_numeric(
+        _timing_field(df, "Servings"), errors="coerce"
+    ).to_numpy(dtype=np.float64)
+    servings = np.where(np.isnan(servings), from_timing, servings)
+
+    out["total_minutes"] = total
+    out["servings"] = servings
+    out["rating"] = numeric("rating")
+    if "cuisine_path" in df.columns:
+        out["cuisine_path"] = df["cuisine_path"].fillna("").astype(str).to_numpy()
+    else:
+        out["cuisine_path"] = ""
+
+
+# -------------------------------------------------
+# INVERTED INGREDIENT INDEX
+# -------------------------------------------------
+INDEX_ATTR = "ingredient_index"
+
+
+class IngredientIndex:
+    """
+    Inverted index over integer ingredient IDs.
+
+    - `vocab[i]` is the core name of ingredient ID i
+    - `matrix` is the CSR recipe x ingredient incidence matrix
+    - `postings` (its CSC twin) lists the rows that use each ingredient
+
+    Only recipes with more than one core are indexed, because
+    match_recipes never scores the others anyway.
+    """
+
+    def __init__(self, vocab: List[str], indptr: np.ndarray, indices: np.ndarray):
+        # identifies this catalog load in cache keys; survives pickling,
+        # so Streamlit's cached copies of a frame share it
+        self.catalog_id: str = uuid.uuid4().hex
+        self.vocab: List[str] = vocab
+        self.core_ids: Dict[str, int] = {core: i for i, core in enumerate(vocab)}
+        self.matrix = sp.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.int32),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(indptr) - 1, len(vocab)),
+        )
+        self.postings = self.matrix.tocsc()
+        # distinct cores per recipe (0 for recipes that are never scored)
+        self.sizes: np.ndarray = np.diff(self.matrix.indptr)
+        # (catalog key, filter key) -> (passing rows, ingredient IDs they use),
+        # see _filter_plan
+        self.filter_plans: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_lists(cls, ingredients_norm: Iterable[List[str]]) -> "IngredientIndex":
+        """Index a whole ingredients_norm column in one go."""
+        builder = IndexBuilder()
+        builder.extend(ingredients_norm)
+        return builder.build()
+
+    def __deepcopy__(self, memo):
+        # Read-only once built: pandas deep-copies df.attrs on most
+        # operations, so copies of the frame simply share the index.
+        return self
+
+    def expand(
+        self,
+        user_cores: Set[str],
+        threshold: float = FUZZY_THRESHOLD,
+        subset: np.ndarray | None = None,
+    ) -> Dict[str, List[str]]:
+        """
+        Map each user core to the indexed cores it matches (best first).
+
+        Every user core is scored once against the vocabulary in a single
+        batched rapidfuzz call, instead of once per recipe. Past
+        TRIGRAM_MIN_VOCAB cores, only the trigram index's candidates for
+        each user core are scored. `subset` (sorted ingredient IDs, e.g.
+        those of filtered recipes) limits scoring to that part of the
+        vocabulary.
+        """
+        n_scored = len(self.vocab) if subset is None else len(subset)
+        with METRICS.span("expand"):
+            trigrams = self.trigrams if n_scored >= TRIGRAM_MIN_VOCAB else None
+            return _expand_cores(sorted(user_cores), self.vocab, threshold, trigrams, subset)
+
+    @property
+    def trigrams(self) -> "TrigramIndex":
+        """Trigram index over the vocabulary, built on first use."""
+        if getattr(self, "_trigrams", None) is None:
+            self._trigrams = TrigramIndex(self.vocab)
+        return self._trigrams
+
+    def rows_for(self, core: str) -> np.ndarray:
+        """Row positions of the recipes that use `core`."""
+        j = self.core_ids[core]
+        return self.postings.indices[self.postings.indptr[j]:self.postings.indptr[j + 1]]
+
+    def row_cores(self, row: int) -> Set[str]:
+        """Core names of the recipe at row position `row`."""
+        ids = self.matrix.indices[self.matrix.indptr[row]:self.matrix.indptr[row + 1]]
+        return {self.vocab[j] for j in ids}
+
+    def candidate_rows(self, expansion: Dict[str, List[str]]) -> np.ndarray:
+        """Sorted row positions that share at least one (fuzzy) core with the user."""
+        reached = {core for cores in expansion.values() for core in cores}
+        if not reached:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([self.rows_for(c) for c in reached]))
+
+
+class IndexBuilder:
+    """
+    Grows an IngredientIndex chunk by chunk (see load_recipes(chunksize=...)).
+
+    The vocabulary and the CSR arrays are appended to in place, in compact
+    `array` buffers, so ingestion never needs the whole catalog's raw text.
+    """
+
+    def __init__(self):
+        self.core_ids: Dict[str, int] = {}
+        self.indptr = array("q", [0])
+        self.indices = array("i")
+
+    def extend(self, ingredients_norm: Iterable[List[str]]) -> None:
+        """Append recipes (lists of cores) in row order."""
+        core_ids = self.core_ids
+        indices = self.indices
+        for cores in ingredients_norm:
+            # ingredients_norm is already deduped, so iterate it in order
+            # to keep the vocabulary order deterministic
+            if cores and len(set(cores)) > 1:
+                for core in cores:
+                    indices.append(core_ids.setdefault(core, len(core_ids)))
+            self.indptr.append(len(indices))
+
+    def build(self) -> IngredientIndex:
+        return IngredientIndex(
+            list(self.core_ids),
+            np.frombuffer(self.indptr, dtype=np.int64),
+            np.frombuffer(self.indices, dtype=np.int32),
+        )
+
+
+# -------------------------------------------------
+# TRIGRAM CANDIDATE INDEX (large vocabularies)
+# -------------------------------------------------
+# Below this many distinct cores brute-force cdist is already fast
+TRIGRAM_MIN_VOCAB = 5000
+
+
+def _trigrams(term: str) -> Set[str]:
+    """Distinct character trigrams of a term padded with two '$' each side."""
+    padded = f"$${term}$$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Character-trigram postings over the ingredient vocabulary.
+
+    Cores are single words, for which token_set_ratio is the normalized
+    Indel similarity: score >= t allows at most d = (1 - t) * (|a| + |b|)
+    insertions / deletions. Each edit destroys at most 3 trigrams, so a
+    true match shares at least |trigrams(query)| - 3 * d of them and
+    differs in length by at most d. candidates() applies exactly those
+    two filters, so it should not lose matches; measure_trigram_recall
+    checks that against brute force.
+    """
+
+    def __init__(self, vocab: List[str]):
+        self.vocab = vocab
+        self.lengths = np.asarray([len(v) for v in vocab], dtype=np.int64)
+        postings: Dict[str, List[int]] = {}
+        for i, term in enumerate(vocab):
+            for gram in _trigrams(term):
+                postings.setdefault(gram, []).append(i)
+        self.postings: Dict[str, np.ndarray] = {
+            gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()
+        }
+
+    def candidates(self, query: str, threshold: float = FUZZY_THRESHOLD) -> np.ndarray:
+        """Sorted vocabulary IDs that may score >= threshold against `query`."""
+        grams = _trigrams(query)
+        n_query = len(query)
+        # per-term edit budget; the epsilon absorbs float error at the boundary
+        budget = np.floor((1.0 - threshold) * (n_query + self.lengths) + 1e-9)
+        need = len(grams) - 3 * budget
+        fits = np.abs(self.lengths - n_query) <= budget
+
+        shared = np.zeros(len(self.vocab), dtype=np.int64)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if lists:
+            ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+            shared[ids] = counts
+        return np.flatnonzero(fits & (shared >= need))
+
+
+def measure_trigram_recall(
+    vocab: List[str],
+    queries: List[str],
+    threshold: float = FUZZY_THRESHOLD,
+) -> Dict[str, float]:
+    """
+    Compare trigram-filtered expansion with brute force over `vocab`.
+
+    Returns recall (fraction of brute-force matches the trigram path also
+    finds) and the average candidate list size per query.
+    """
+    queries = list(dict.fromkeys(queries))
+    trigrams = TrigramIndex(vocab)
+    brute = _expand_cores(queries, vocab, threshold)
+    fast = _expand_cores(queries, vocab, threshold, trigrams)
+    expected = sum(len(v) for v in brute.values())
+    found = sum(len(set(brute[q]) & set(fast[q])) for q in queries)
+    n_candidates = sum(len(trigrams.candidates(q, threshold)) for q in queries)
+    return {
+        "queries": len(queries),
+        "vocab_size": len(vocab),
+        "recall": found / expected if expected else 1.0,
+        "avg_candidates": n_candidates / len(queries) if queries else 0.0,
+    }
+
+
+def _expand_cores(
+    user_cores: List[str],
+    vocab: List[str],
+    threshold: float = FUZZY_THRESHOLD,
+    trigrams: TrigramIndex | None = None,
+    subset: np.ndarray | None = None,
+) -> Dict[str, List[str]]:
+    """
+    Score user cores against a vocabulary with one rapidfuzz cdist call.
+
+    Returns {user_core: [vocab cores scoring >= threshold, best first]}.
+    An exact vocabulary hit always scores 100 and therefore comes first.
+    With `trigrams`, each user core is only scored against its candidates;
+    with `subset`, only vocabulary IDs in it are scored at all.
+    """
+    expansion: Dict[str, List[str]] = {u: [] for u in user_cores}
+    ids = np.arange(len(vocab)) if subset is None else subset
+    if not user_cores or len(ids) == 0:
+        return expansion
+
+    if trigrams is None:
+        columns = [ids] * len(user_cores)
+        METRICS.observe("fuzzy_comparisons", len(user_cores) * len(ids))
+        scores = process.cdist(
+            user_cores,
+            vocab if subset is None else [vocab[j] for j in ids],
+            scorer=fuzz.token_set_ratio,
+            score_cutoff=threshold * 100.0,
+            dtype=np.float64,
+        )
+    else:
+        columns = [trigrams.candidates(u, threshold) for u in user_cores]
+        if subset is not None:
+            columns = [c[np.isin(c, subset, assume_unique=True)] for c in columns]
+        METRICS.observe("fuzzy_comparisons", sum(len(c) for c in columns))
+        scores = [
+            process.cdist(
+                [u],
+                [vocab[j] for j in cols],
+                scorer=fuzz.token_set_ratio,
+                score_cutoff=threshold * 100.0,
+                dtype=np.float64,
+            )[0]
+            for u, cols in zip(user_cores, columns)
+        ]
+
+    for u, cols, row in zip(user_cores, columns, scores):
+        # same comparison as the per-pair loop used to make
+        hits = [k for k in np.flatnonzero(row) if row[k] / 100.0 >= threshold]
+        # stable sort keeps vocabulary order between equal scores
+        hits.sort(key=lambda k: -row[k])
+        expansion[u] = [vocab[cols[k]] for k in hits]
+    return expansion
+
+
+# id(frame) -> (weakref to it, its validated index, its catalog key);
+# validation is O(rows), so each frame object pays it once
+_BOUND: Dict[int, Tuple[weakref.ref, "IngredientIndex", str]] = {}
+# columns whose values end up in results or filters (see _build_result)
+RESULT_COLS = (
+    "display_name", "health_score", "protein_g", "fat_g", "sugar_g", "carbs_g", "url",
+    *FACT_COLS, "cuisine_path",
+)
+
+
+def _bind_index(df: pd.DataFrame, index: IngredientIndex) -> IngredientIndex:
+    """Attach `index` to `df`, remembering the exact row lists it was built from."""
+    index.source = df["ingredients_norm"].to_numpy(dtype=object, copy=True)
+    df.attrs[INDEX_ATTR] = index
+    return index
+
+
+def _index_describes(index: IngredientIndex, df: pd.DataFrame, sample: int | None = None) -> bool:
+    """
+    Whether `index` was built from `df`'s ingredient lists, in this order.
+
+    pandas copies attrs onto filtered / reordered / edited frames, where
+    the index's row positions no longer line up. Rows are compared by
+    list identity (copies and pickles of a frame keep it); `sample`
+    checks only that many evenly spaced rows.
+    """
+    source = getattr(index, "source", None)
+    if source is None or len(source) != len(df):
+        return False
+    col = df["ingredients_norm"].to_numpy(dtype=object)
+    if sample is not None and len(col) > sample:
+        pos = np.linspace(0, len(col) - 1, sample).astype(np.int64)
+        col, source = col[pos], source[pos]
+    return all(map(operator.is_, col, source))
+
+
+def _get_bound(df: pd.DataFrame) -> Tuple[IngredientIndex, str]:
+    """(index, catalog key) for `df`, building the index if it has no valid one."""
+    hit = _BOUND.get(id(df))
+    if (
+        hit is not None
+        and hit[0]() is df
+        and df.attrs.get(INDEX_ATTR) is hit[1]
+        # cheap guard against in-place reordering since validation
+        and _index_describes(hit[1], df, sample=64)
+    ):
+        return hit[1], hit[2]
+
+    index = df.attrs.get(INDEX_ATTR)
+    if index is None or not _index_describes(index, df):
+        index = _bind_index(df, IngredientIndex.from_lists(df["ingredients_norm"]))
+    key = f"{index.catalog_id}-{_content_digest(df)}"
+    ref = weakref.ref(df, lambda _, k=id(df): _BOUND.pop(k, None))
+    _BOUND[id(df)] = (ref, index, key)
+    return index, key
+
+
+def _content_digest(df: pd.DataFrame) -> str:
+    """Hash of the result / filter columns, so edited copies never share cached results."""
+    cols = [c for c in RESULT_COLS if c in df.columns]
+    h = hashlib.blake2b(digest_size=8)
+    h.update(repr(cols).encode())
+    if cols:
+        h.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _get_index(df: pd.DataFrame) -> IngredientIndex:
+    """Index attached by load_recipes; built on the fly for other frames."""
+    return _get_bound(df)[0]
+
+
+def catalog_key(df: pd.DataFrame) -> str:
+    """
+    Identifies `df`'s exact contents in cache keys: its index's
+    catalog_id plus a hash of the columns results are built from.
     """
+    return _get_bound(df)[1]
+
+
+# -------------------------------------------------
+# COMPILED RECIPE ARTIFACT
+# -------------------------------------------------
+# Bump whenever parsing / normalisation changes so old artifacts rebuild
+PARSER_VERSION = 3
+ARTIFACT_DIR = BASE_DIR / "data" / "cache"
+
+
+def _file_sha256(p: Path) -> str:
+    """Hex digest of a file's contents, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _artifact_path(p: Path, digest: str) -> Path:
+    """
+    Artifact location for a source file with the given content hash.
+    The name carries a hash of the resolved path too, so two catalogs
+    that share a file name (data/raw/recipes.csv, data/cleaned/recipes.csv)
+    never replace each other's artifacts.
+    """
+    source = hashlib.sha256(str(p.resolve()).encode("utf-8")).hexdigest()[:8]
+    return ARTIFACT_DIR / f"{p.stem}-{source}-{digest[:16]}-v{PARSER_VERSION}.npz"
+
+
+def _pack_strings(values: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as one UTF-8 byte blob + offsets (no pickling needed)."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """Inverse of _pack_strings."""
+    data = blob.tobytes()
+    bounds = offsets.tolist()
+    return [data[a:b].decode("utf-8") for a, b in zip(bounds[:-1], bounds[1:])]
+
+
+def _save_artifact(out: pd.DataFrame, path: Path, digest: str) -> None:
+    """
+    Write the normalized frame as an NPZ: display names, URLs, ingredient
+    core IDs (CSR layout) + their vocabulary, the nutrient panel and the
+    recipe facts (time, servings, rating, cuisine path).
+    """
+    core_ids: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    for cores in out["ingredients_norm"]:
+        for core in cores:
+            indices.append(core_ids.setdefault(core, len(core_ids)))
+        indptr.append(len(indices))
+
+    arrays = {
+        "parser_version": np.asarray(PARSER_VERSION),
+        "source_sha256": np.asarray(digest),
+        "ing_indptr": np.asarray(indptr, dtype=np.int64),
+        "ing_indices": np.asarray(indices, dtype=np.int32),
+    }
+    for name, values in [
+        ("vocab", list(core_ids)),
+        ("display_name", out["display_name"]),
+        ("url", out["url"]),
+        ("cuisine_path", out["cuisine_path"]),
+    ]:
+        arrays[f"{name}_blob"], arrays[f"{name}_offsets"] = _pack_strings(values)
+    # macros are the float64 source of truth; the float32 panel is derived
+    panel = out[NUTRIENT_COLS].to_numpy(dtype=np.float64)
+    for col, source in MACRO_SOURCES.items():
+        panel[:, NUTRIENT_COLS.index(source)] = out[col].to_numpy(dtype=np.float64)
+    arrays["nutrients"] = panel
+    arrays["facts"] = out[FACT_COLS].to_numpy(dtype=np.float64)
+
+    # Write to a temp file and rename, so readers never see half an artifact
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+    # Drop artifacts of older versions of the same source file ("<stem>-<path hash>")
+    prefix = path.name.rsplit("-", 2)[0]
+    for old in path.parent.glob(f"{prefix}-{'?' * 16}-v*.npz"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def _load_artifact(path: Path, digest: str) -> pd.DataFrame | None:
+    """Normalized frame from a valid artifact, or None if missing / stale."""
+    if not path.exists():
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            if int(z["parser_version"]) != PARSER_VERSION:
+                return None
+            if str(z["source_sha256"]) != digest:
+                return None
+
+            vocab = _unpack_strings(z["vocab_blob"], z["vocab_offsets"])
+            indptr = z["ing_indptr"].tolist()
+            indices = z["ing_indices"].tolist()
+            ingredients_norm = [
+                [vocab[j] for j in indices[a:b]]
+                for a, b in zip(indptr[:-1], indptr[1:])
+            ]
+
+            out = pd.DataFrame({
+                "display_name": _unpack_strings(z["display_name_blob"], z["display_name_offsets"]),
+                "ingredients_norm": ingredients_norm,
+                "url": _unpack_strings(z["url_blob"], z["url_offsets"]),
+            })
+            panel = z["nutrients"]
+            if panel.shape != (len(out), len(NUTRIENTS)):
+                return None
+            _add_nutrition_columns(out, panel)
+
+            facts = z["facts"]
+            if facts.shape != (len(out), len(FACT_COLS)):
+                return None
+            for i, col in enumerate(FACT_COLS):
+                out[col] = facts[:, i]
+            out["cuisine_path"] = _unpack_strings(
+                z["cuisine_path_blob"], z["cuisine_path_offsets"]
+            )
+    except (OSError, ValueError, KeyError):
+        # Corrupt / foreign file: treat as stale and rebuild
+        return None
+    return out
+
+
+def build_recipe_artifact(
+    csv_path: str | Path,
+    chunksize: int | None = None,
+    workers: int | None = None,
+) -> Path:
+    """Parse a recipe CSV and (re)write its compiled artifact; returns its path."""
+    p = _resolve_csv_path(csv_path)
+    digest = _file_sha256(p)
+    path = _artifact_path(p, digest)
+    _save_artifact(_parse_recipes(p, chunksize=chunksize, workers=workers), path, digest)
+    return path
+
+
+# -------------------------------------------------
+# LOAD & PREPARE DATAFRAME
+# -------------------------------------------------
+def _resolve_csv_path(csv_path: str | Path) -> Path:
+    """Resolve a CSV path against the project root, with known fallbacks."""
     p = Path(csv_path)
     if not p.is_absolute():
         p = BASE_DIR / p
@@ -185,164 +859,879 @@ def load_recipes(csv_path: str | Path) -> pd.DataFrame:
             if alt.exists():
                 p = alt
                 break
+    return p
+
+
+def _parse_ingredients(x) -> List[str]:
+    """Parse ingredient list and extract core ingredient names."""
+    if not isinstance(x, str):
+        return []
     
-    df = pd.read_csv(p)
+    x = x.strip()
+    core_ingredients: List[str] = []
     
-    def parse_ings(x):
-        """Parse ingredient list and extract core ingredient names."""
-        if not isinstance(x, str):
-            return []
-        
-        x = x.strip()
-        core_ingredients: List[str] = []
-        
-        # Try parsing as Python list
-        if x.startswith("[") and x.endswith("]"):
-            try:
-                val = literal_eval(x)
-                if isinstance(val, list):
-                    for item in val:
-                        core = _clean_ingredient_to_core(item)
-                        if core:
-                            core_ingredients.append(core)
-                    return _normalize_list(core_ingredients)
-            except Exception:
-                pass
-        
-        # Fallback: comma-separated
-        parts = [p.strip() for p in x.split(",")]
-        for p in parts:
-            core = _clean_ingredient_to_core(p)
-            if core:
-                core_ingredients.append(core)
-        
-        return _normalize_list(core_ingredients)
+    # Try parsing as Python list
+    if x.startswith("[") and x.endswith("]"):
+        try:
+            val = literal_eval(x)
+            if isinstance(val, list):
+                for item in val:
+                    core = _clean_ingredient_to_core(item)
+                    if core:
+                        core_ingredients.append(core)
+                return _normalize_list(core_ingredients)
+        except Exception:
+            pass
     
+    # Fallback: comma-separated
+    parts = [p.strip() for p in x.split(",")]
+    for p in parts:
+        core = _clean_ingredient_to_core(p)
+        if core:
+            core_ingredients.append(core)
+    
+    return _normalize_list(core_ingredients)
+
+
+def _normalize_slice(cells: List) -> Tuple[List[str], List[List[int]]]:
+    """
+    Worker side of parallel ingestion: parse a slice of ingredient cells.
+
+    Returns the slice's local vocabulary (first-appearance order) and each
+    row's cores as local IDs, which pickle much smaller than the strings.
+    """
+    local_ids: Dict[str, int] = {}
+    rows = [
+        [local_ids.setdefault(core, len(local_ids)) for core in _parse_ingredients(x)]
+        for x in cells
+    ]
+    return list(local_ids), rows
+
+
+def _parse_ingredients_parallel(
+    cells: List,
+    pool: Executor,
+    n_slices: int,
+) -> List[List[str]]:
+    """
+    _parse_ingredients over `cells` on a process pool, row order preserved.
+
+    Slices are merged in order into one global ID space, so every core
+    string is shared and the result equals the serial path row for row.
+    """
+    bounds = np.linspace(0, len(cells), n_slices + 1).astype(int)
+    slices = [cells[a:b] for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    global_ids: Dict[str, int] = {}
+    vocab: List[str] = []
+    parsed: List[List[str]] = []
+    for local_vocab, rows in pool.map(_normalize_slice, slices):
+        remap = []
+        for core in local_vocab:
+            if core not in global_ids:
+                global_ids[core] = len(vocab)
+                vocab.append(core)
+            remap.append(global_ids[core])
+        parsed.extend([vocab[remap[j]] for j in row] for row in rows)
+    return parsed
+
+
+# The only raw columns ingestion needs; directions, img_src etc. are skipped
+NAME_COLS = ["recipe_name", "title", "name"]
+SOURCE_COLS = {
+    "ingredients", "url", "nutrition",
+    "total_time", "timing", "servings", "rating", "cuisine_path",
+    *NAME_COLS,
+}
+
+
+def _normalize_chunk(
+    df: pd.DataFrame,
+    pool: Executor | None = None,
+    n_slices: int = 1,
+) -> pd.DataFrame:
+    """
+    Normalize ingredients, names, URLs, nutrition and facts of one raw chunk.
+
+    With a `pool`, ingredient parsing is split into `n_slices` slices.
+    """
     if "ingredients" not in df.columns:
         raise ValueError("CSV has no 'ingredients' column")
     
-    df["ingredients_norm"] = df["ingredients"].apply(parse_ings)
-    
     # Display name
     name_col = None
-    for col in ["recipe_name", "title", "name"]:
+    for col in NAME_COLS:
         if col in df.columns:
             name_col = col
             break
     
     if name_col is not None:
-        df["display_name"] = df[name_col].fillna("").astype(str)
+        display_name = df[name_col].fillna("").astype(str)
     else:
-        df["display_name"] = df.index.astype(str)
+        display_name = df.index.astype(str)
     
-    out = df[["display_name", "ingredients_norm"]].copy()
-    # keep URL if present in the dataset
+    with METRICS.span("load.ingredients"):
+        if pool is None:
+            ingredients_norm = df["ingredients"].apply(_parse_ingredients)
+        else:
+            ingredients_norm = pd.Series(
+                _parse_ingredients_parallel(df["ingredients"].tolist(), pool, n_slices),
+                index=df.index,
+                dtype=object,
+            )
+
+    out = pd.DataFrame({
+        "display_name": display_name,
+        "ingredients_norm": ingredients_norm,
+    })
     # keep URL if present in the dataset
     if "url" in df.columns:
         out["url"] = df["url"].fillna("").astype(str)
     else:
         out["url"] = ""
 
-    
-    # Nutrition parsing
-    if "nutrition" in df.columns:
-        out["protein_g"] = df["nutrition"].apply(lambda s: _extract_grams(s, "Protein"))
-        out["fat_g"] = df["nutrition"].apply(lambda s: _extract_grams(s, "Total Fat"))
-        out["fiber_g"] = df["nutrition"].apply(lambda s: _extract_grams(s, "Dietary Fiber"))
-        out["sugar_g"] = df["nutrition"].apply(lambda s: _extract_grams(s, "Total Sugars"))
-        out["carbs_g"] = df["nutrition"].apply(lambda s: _extract_grams(s, "Total Carbohydrate"))
+    # Nutrition parsing: full panel as float32, macros kept at float64
+    with METRICS.span("load.nutrition"):
+        if "nutrition" in df.columns:
+            panel = _parse_nutrition(df["nutrition"])
+        else:
+            panel = np.zeros((len(df), len(NUTRIENTS)), dtype=np.float64)
+        _add_nutrition_columns(out, panel)
+
+    # Typed time / servings / rating / cuisine columns for filtering
+    with METRICS.span("load.facts"):
+        _add_fact_columns(out, df)
+
+    return out
+
+
+def _parse_recipes(
+    p: Path,
+    chunksize: int | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Read the raw CSV (needed columns only) and normalize it.
+
+    With `chunksize` the file is streamed: each chunk is normalized and its
+    raw text dropped before the next one is read, while the ingredient
+    vocabulary / postings grow incrementally in an IndexBuilder. Peak
+    memory is then the normalized output plus one raw chunk.
+
+    With `workers` > 1 ingredient parsing runs on a process pool; the
+    output is identical to the serial path.
+    """
+    with METRICS.span("load.csv_read"):
+        read = pd.read_csv(p, usecols=lambda c: c in SOURCE_COLS, chunksize=chunksize)
+    chunks = iter(read if chunksize else [read])
+
+    pool = ProcessPoolExecutor(workers) if workers and workers > 1 else None
+    # a few slices per worker keeps them busy when slices are uneven
+    n_slices = (workers or 1) * 4
+
+    builder = IndexBuilder()
+    parts: List[pd.DataFrame] = []
+    try:
+        while True:
+            # chunked readers only read (and tokenize) on iteration
+            with METRICS.span("load.csv_read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            part = _normalize_chunk(chunk, pool=pool, n_slices=n_slices)
+            with METRICS.span("load.index"):
+                builder.extend(part["ingredients_norm"])
+            parts.append(part)
+            del chunk
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if len(parts) == 1:
+        out = parts[0].reset_index(drop=True)
     else:
-        for col in ["protein_g", "fat_g", "fiber_g", "sugar_g", "carbs_g"]:
-            out[col] = 0.0
-    
+        out = pd.concat(parts, ignore_index=True)
+    _bind_index(out, builder.build())
     return out
 
+
+def load_recipes(
+    csv_path: str | Path,
+    use_artifact: bool = True,
+    chunksize: int | None = None,
+    workers: int | None = None,
+) -> pd.DataFrame:
+    """
+    Loads your recipe CSV and returns a normalized DataFrame.
+    Each recipe gets a list of CORE ingredient names (one per ingredient).
+
+    With `use_artifact` the parsed result is cached in ARTIFACT_DIR, keyed
+    by the CSV's content hash and PARSER_VERSION; later cold starts load
+    it instead of re-parsing, and a changed CSV or parser rebuilds it.
+
+    `chunksize` streams the CSV that many rows at a time, for catalogs
+    whose raw text does not fit in memory, and `workers` parses
+    ingredients on that many processes (both only matter when parsing).
+    """
+    with METRICS.span("load"):
+        p = _resolve_csv_path(csv_path)
+
+        out = None
+        if use_artifact:
+            digest = _file_sha256(p)
+            path = _artifact_path(p, digest)
+            with METRICS.span("load.artifact_read"):
+                out = _load_artifact(path, digest)
+            if out is None:
+                out = _parse_recipes(p, chunksize=chunksize, workers=workers)
+                try:
+                    with METRICS.span("load.artifact_write"):
+                        _save_artifact(out, path, digest)
+                except OSError:
+                    # Read-only deploys still work, they just parse every time
+                    pass
+        else:
+            out = _parse_recipes(p, chunksize=chunksize, workers=workers)
+
+        # Inputs never change after loading, so score once here
+        with METRICS.span("load.health"):
+            out["health_score"] = _compute_health_score(out)
+
+        index = out.attrs.get(INDEX_ATTR)
+        if index is None or not _index_describes(index, out):
+            _bind_index(out, IngredientIndex.from_lists(out["ingredients_norm"]))
+
+        # A reloaded catalog gets a new catalog_id; drop results for the old one
+        RESULT_CACHE.clear()
+        return out
+
 # -------------------------------------------------
 # HEALTH SCORE LOGIC
 # -------------------------------------------------
-def _compute_health_score(row: pd.Series) -> float:
-    """Health score in [0,1] based on macros."""
-    protein = float(row.get("protein_g", 0.0) or 0.0)
-    fat = float(row.get("fat_g", 0.0) or 0.0)
-    sugar = float(row.get("sugar_g", 0.0) or 0.0)
-    carbs = float(row.get("carbs_g", 0.0) or 0.0)
-    net_carbs = max(carbs, 0.0)
-    
-    PROTEIN_TARGET = 20.0
-    FAT_LIMIT = 25.0
-    SUGAR_LIMIT = 40.0
-    NET_CARBS_LIMIT = 120.0
-    
-    protein_score = min(protein / PROTEIN_TARGET, 1.0)
-    fat_score = 1.0 - min(fat / FAT_LIMIT, 1.0)
-    sugar_score = 1.0 - min(sugar / SUGAR_LIMIT, 1.0)
-    net_carbs_score = 1.0 - min(net_carbs / NET_CARBS_LIMIT, 1.0)
-    
+PROTEIN_TARGET = 20.0
+FAT_LIMIT = 25.0
+SUGAR_LIMIT = 40.0
+NET_CARBS_LIMIT = 120.0
+
+
+def _compute_health_score(df: pd.DataFrame) -> np.ndarray:
+    """Health score in [0,1] based on macros, for every row at once."""
+    def col(name: str) -> np.ndarray:
+        if name not in df.columns:
+            return np.zeros(len(df))
+        return df[name].fillna(0.0).to_numpy(dtype=np.float64)
+
+    protein = col("protein_g")
+    fat = col("fat_g")
+    sugar = col("sugar_g")
+    net_carbs = np.maximum(col("carbs_g"), 0.0)
+
+    protein_score = np.minimum(protein / PROTEIN_TARGET, 1.0)
+    fat_score = 1.0 - np.minimum(fat / FAT_LIMIT, 1.0)
+    sugar_score = 1.0 - np.minimum(sugar / SUGAR_LIMIT, 1.0)
+    net_carbs_score = 1.0 - np.minimum(net_carbs / NET_CARBS_LIMIT, 1.0)
+
     health = (
         0.40 * protein_score +
         0.25 * fat_score +
         0.20 * sugar_score +
         0.15 * net_carbs_score
     )
-    return float(max(0.0, min(1.0, health)))
+    return np.clip(health, 0.0, 1.0)
 
 
 def _fuzzy_intersection(
     user_cores: Set[str],
     recipe_cores: Set[str],
-    threshold: float = 0.82,
+    expansion: Dict[str, List[str]],
 ) -> Set[str]:
     """
     Greedy 1–1 fuzzy matching between user ingredient cores and recipe cores.
 
     - Uses exact matches first.
-    - Then uses fuzzy matches (RapidFuzz token_set_ratio).
+    - Then gives each remaining user core its best-scoring, still unused
+      recipe core from the precomputed `expansion` (see _expand_cores).
     - Returns the set of recipe-side cores that matched.
     """
     if not user_cores or not recipe_cores:
         return set()
 
-    recipe_set: Set[str] = set(recipe_cores)
-
     # 1) Exact matches first
-    exact = user_cores & recipe_set
-    matches: Set[str] = set(exact)
-    used_recipe: Set[str] = set(exact)
+    matches: Set[str] = user_cores & recipe_cores
 
-    remaining_user = user_cores - exact
-    remaining_recipe = recipe_set - used_recipe
+    # 2) Fuzzy matches for remaining items: set lookups only
+    for u in sorted(user_cores - matches):
+        for r in expansion.get(u, ()):
+            if r in recipe_cores and r not in matches:
+                matches.add(r)
+                break
 
-    # 2) Fuzzy matches for remaining items
-    for u in remaining_user:
-        best_r = None
-        best_score = 0.0
+    return matches
 
-        for r in list(remaining_recipe):
-            # token_set_ratio is robust to small differences / word order
-            score = fuzz.token_set_ratio(u, r) / 100.0
-            if score > best_score:
-                best_score = score
-                best_r = r
 
-        if best_r is not None and best_score >= threshold:
-            matches.add(best_r)
-            remaining_recipe.remove(best_r)
+# -------------------------------------------------
+# SCORING ENGINES
+# -------------------------------------------------
+# Both engines take an optional sorted `rows` restriction (filtered
+# recipes) and return, for every such recipe with at least one match:
+#   rows    - row positions (ascending)
+#   matches - greedy 1–1 fuzzy match counts
+#   exact   - |user_cores ∩ recipe_cores| (needed for the Jaccard union)
+def _candidates(
+    index: IngredientIndex,
+    expansion: Dict[str, List[str]],
+    rows: np.ndarray | None = None,
+) -> np.ndarray:
+    """Sorted rows reachable through `expansion`'s postings, within `rows` if given."""
+    candidates = index.candidate_rows(expansion)
+    if rows is not None:
+        candidates = np.intersect1d(candidates, rows, assume_unique=True)
+    return candidates
 
-    return matches
+
+def _score_python(
+    index: IngredientIndex,
+    user_cores: Set[str],
+    expansion: Dict[str, List[str]],
+    rows: np.ndarray | None = None,
+):
+    """Reference engine: Python sets, one candidate recipe at a time."""
+    with METRICS.span("score"):
+        candidates = _candidates(index, expansion, rows)
+        rows: List[int] = []
+        matches: List[int] = []
+        exact: List[int] = []
+        for pos in candidates:
+            recipe_set = index.row_cores(pos)
+            matched = _fuzzy_intersection(user_cores, recipe_set, expansion)
+            if matched:
+                rows.append(pos)
+                matches.append(len(matched))
+                exact.append(len(user_cores & recipe_set))
+    METRICS.observe("rows_scanned", len(candidates))
+    METRICS.observe("candidates", len(rows))
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(matches, dtype=np.int64),
+        np.asarray(exact, dtype=np.int64),
+    )
+
+
+def _sparse_counts(
+    index: IngredientIndex,
+    pantries: List[Set[str]],
+    expansion: Dict[str, List[str]],
+    rows: np.ndarray | None = None,
+):
+    """
+    Vectorized engine for many pantries: a few sparse matrix products.
+
+    With A the recipe x ingredient matrix and E the (pantry, user core) x
+    ingredient expansion matrix, A @ E.T holds the candidate
+    (user core, recipe core) pairs of every recipe. Where those pairs are
+    disjoint (each user core and each recipe core appears in at most one
+    pair) the greedy 1–1 count is simply the number of reachable recipe
+    cores. The few recipes with competing pairs fall back to
+    _fuzzy_intersection.
+
+    `rows` (sorted) restricts scoring to those recipes only.
+    Returns one (rows, matches, exact) triple per pantry.
+    """
+    with METRICS.span("score"):
+        A = index.matrix if rows is None else index.matrix[rows]
+        n_vocab = len(index.vocab)
+        n_pantries = len(pantries)
+
+        # one E row per (pantry, user core); S maps those rows to their pantry
+        e_rows: List[int] = []
+        e_cols: List[int] = []
+        x_rows: List[int] = []
+        x_cols: List[int] = []
+        owner: List[int] = []
+        for p, user_cores in enumerate(pantries):
+            for u in sorted(user_cores):
+                for core in expansion.get(u, ()):
+                    e_rows.append(len(owner))
+                    e_cols.append(index.core_ids[core])
+                if u in index.core_ids:
+                    x_rows.append(index.core_ids[u])
+                    x_cols.append(p)
+                owner.append(p)
+
+        def incidence(r, c, shape):
+            return sp.csr_matrix((np.ones(len(r), dtype=np.int32), (r, c)), shape=shape)
+
+        E = incidence(e_rows, e_cols, (len(owner), n_vocab))
+        S = incidence(np.arange(len(owner)), owner, (len(owner), n_pantries))
+        X_exact = incidence(x_rows, x_cols, (n_vocab, n_pantries))
+
+        W = (E.T @ S).tocsc()                # user cores reaching each ingredient
+        X = W.copy()
+        X.data[:] = 1                        # ingredient reachable at all
+
+        RU = (A @ E.T).tocsr()
+        RU.data[:] = 1                       # user core has a partner in recipe
+
+        def columns(M):
+            M = M.tocsc()
+            M.sort_indices()
+            return M
+
+        hits = columns(A @ X)                # recipe cores with a partner
+        pairs = columns(A @ W)               # candidate pairs
+        users_hit = columns(RU @ S)          # user cores with a partner
+        exact_hits = columns(A @ X_exact)
+
+        def column(M, p, rows):
+            """Column p of M at `rows` (which cover its nonzeros)."""
+            lo, hi = M.indptr[p], M.indptr[p + 1]
+            values = np.zeros(len(rows), dtype=np.int64)
+            values[np.searchsorted(rows, M.indices[lo:hi])] = M.data[lo:hi]
+            return values
+
+        out = []
+        for p, user_cores in enumerate(pantries):
+            lo, hi = hits.indptr[p], hits.indptr[p + 1]
+            local = hits.indices[lo:hi].astype(np.int64)
+            matches = hits.data[lo:hi].astype(np.int64)
+            exact = column(exact_hits, p, local)
+
+            tangled = np.flatnonzero(
+                (column(pairs, p, local) != matches)
+                | (column(users_hit, p, local) != matches)
+            )
+            found = local if rows is None else np.asarray(rows, dtype=np.int64)[local]
+            METRICS.inc("greedy_fallbacks", len(tangled))
+            METRICS.observe("candidates", len(found))
+            for k in tangled:
+                matches[k] = len(
+                    _fuzzy_intersection(user_cores, index.row_cores(found[k]), expansion)
+                )
+            out.append((found, matches, exact))
+    METRICS.observe("rows_scanned", A.shape[0] * n_pantries)
+    return out
+
+
+def _score_sparse(
+    index: IngredientIndex,
+    user_cores: Set[str],
+    expansion: Dict[str, List[str]],
+    rows: np.ndarray | None = None,
+):
+    """
+    Vectorized engine: _sparse_counts for a single pantry, over only the
+    recipes its expansion's postings reach, so cost follows the postings
+    rather than the catalog size.
+    """
+    candidates = _candidates(index, expansion, rows)
+    return _sparse_counts(index, [user_cores], expansion, rows=candidates)[0]
+
+
+ENGINES = {
+    "python": _score_python,
+    "sparse": _score_sparse,
+}
+
+
+def _score_arrays(
+    n_user: int,
+    sizes: np.ndarray,
+    matches: np.ndarray,
+    exact: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """pct_recipe, pct_user, jaccard and final score for whole arrays at once."""
+    # Percent of the recipe you can actually cook
+    pct_recipe = matches / sizes
+    # Percent of your list that got used (still useful for display)
+    pct_user = matches / n_user
+    # Jaccard similarity between user + recipe ingredient sets
+    jaccard = matches / (n_user + sizes - exact)
+    # Final match score: emphasize "how complete is this recipe"
+    score = 0.7 * pct_recipe + 0.3 * jaccard
+    return {
+        "pct_recipe": pct_recipe,
+        "pct_user": pct_user,
+        "jaccard": jaccard,
+        "score": score,
+    }
+
+
+def _top_k(
+    score: np.ndarray,
+    sizes: np.ndarray,
+    rows: np.ndarray,
+    k: int,
+) -> List[int]:
+    """
+    Positions (into the arrays) of the k best candidates, best first.
+
+    Order is by score, then by smaller recipe size (simpler recipes
+    first), then by row, using a bounded heap over compact
+    (-score, recipe_size, row, position) tuples. Large candidate sets
+    are first cut down to the k-th best score with argpartition (ties
+    kept), so the heap only ever sees a handful of tuples.
+    """
+    n = len(rows)
+    if k <= 0 or n == 0:
+        return []
+    keep = np.arange(n)
+    if n > 4 * k:
+        kth = np.partition(-score, k - 1)[k - 1]
+        keep = np.flatnonzero(-score <= kth)
+    best = heapq.nsmallest(
+        k,
+        zip((-score[keep]).tolist(), sizes[keep].tolist(), rows[keep].tolist(), keep.tolist()),
+    )
+    return [t[-1] for t in best]
+
+
+def _top_k_healthy(
+    health: np.ndarray,
+    score: np.ndarray,
+    sizes: np.ndarray,
+    rows: np.ndarray,
+    k: int,
+) -> List[int]:
+    """
+    Positions of the k healthiest candidates, healthiest first.
+
+    Ties on health go to the better match, then as in _top_k. Same
+    argpartition prefilter + bounded heap as _top_k.
+    """
+    n = len(rows)
+    if k <= 0 or n == 0:
+        return []
+    keep = np.arange(n)
+    if n > 4 * k:
+        kth = np.partition(-health, k - 1)[k - 1]
+        keep = np.flatnonzero(-health <= kth)
+    best = heapq.nsmallest(
+        k,
+        zip(
+            (-health[keep]).tolist(), (-score[keep]).tolist(),
+            sizes[keep].tolist(), rows[keep].tolist(), keep.tolist(),
+        ),
+    )
+    return [t[-1] for t in best]
+
+
+def _pareto_front(score: np.ndarray, health: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """
+    Positions of the candidates no other candidate beats on both match
+    score and health, best match first (one per identical point).
+    """
+    if len(score) == 0:
+        return np.empty(0, dtype=np.int64)
+    # best match first; among equal scores the healthiest, then smallest
+    order = np.lexsort((sizes, -health, -score))
+    h = health[order]
+    best_before = np.concatenate([[-np.inf], np.maximum.accumulate(h)[:-1]])
+    return order[h > best_before]
+
+
+def _build_result(
+    df: pd.DataFrame,
+    index: IngredientIndex,
+    pos: int,
+    user_cores: Set[str],
+    expansion: Dict[str, List[str]],
+    fields: Dict[str, float],
+) -> Dict:
+    """Materialize the display dict for one winning recipe."""
+    row = df.iloc[pos]
+    matched_ingredients = _fuzzy_intersection(
+        user_cores, index.row_cores(pos), expansion
+    )
+    return {
+        "name":         row["display_name"],
+        "matches":      fields["matches"],
+        "pct_recipe":   fields["pct_recipe"],
+        "pct_user":     fields["pct_user"],
+        "score":        fields["score"],
+        "jaccard":      fields["jaccard"],
+        "recipe_size":  fields["recipe_size"],
+        "health_score": float(row["health_score"]),
+        "protein_g":    float(row.get("protein_g", 0.0) or 0.0),
+        "fat_g":        float(row.get("fat_g", 0.0) or 0.0),
+        "sugar_g":      float(row.get("sugar_g", 0.0) or 0.0),
+        "carbs_g":      float(row.get("carbs_g", 0.0) or 0.0),
+        "url":          str(row.get("url", "") or ""),
+        # for debugging / potential UI use
+        "matched_cores": sorted(matched_ingredients),
+        "user_cores":    sorted(user_cores),
+    }
 
 
 # -------------------------------------------------
-# MATCHING LOGIC - FIXED
+# RESULT CACHE
 # -------------------------------------------------
+# Bump whenever scoring / ranking changes so cached results are not reused
+ENGINE_VERSION = 1
+
+# Shared by every session in the process; many users cook the same pantry
+RESULT_CACHE = QueryCache(max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=None)
+
+
+def _copy_results(results: List[Dict]) -> List[Dict]:
+    """
+    Copies of result dicts, down to their core lists, for the cache and
+    for callers: neither can then mutate what the other holds.
+    """
+    return [
+        {k: list(v) if isinstance(v, list) else v for k, v in r.items()}
+        for r in results
+    ]
+
+
+def result_cache_stats() -> Dict[str, float]:
+    """Entries, bytes, hits / misses / evictions and hit rate of RESULT_CACHE."""
+    return RESULT_CACHE.stats()
+
+
+# -------------------------------------------------
+# RECIPE FILTERS
+# -------------------------------------------------
+# filter name -> the load_recipes column it reads
+FILTERS = {
+    "max_minutes":  "total_minutes",
+    "min_rating":   "rating",
+    "min_servings": "servings",
+    "max_servings": "servings",
+    "cuisine":      "cuisine_path",
+}
+
+# Distinct (frame, filters) combinations whose plans are kept per index
+FILTER_PLAN_CACHE_SIZE = 32
+
+
+def _filter_key(filters: Dict | None) -> Tuple | None:
+    """
+    Canonical, hashable form of a filters dict; None if it filters nothing.
+
+    e.g. {"max_minutes": 30, "cuisine": "Italian"} or
+    {"min_rating": 4.5, "cuisine": ["Mexican", "Cuisine/Asian"]}
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - set(FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s) {sorted(unknown)}; expected some of {sorted(FILTERS)}")
+
+    items = []
+    for name, value in sorted(filters.items()):
+        if value is None:
+            continue
+        if name == "cuisine":
+            values = [value] if isinstance(value, str) else list(value)
+            value = tuple(sorted({v.strip("/").lower() for v in values}))
+        else:
+            value = float(value)
+        items.append((name, value))
+    return tuple(items) or None
+
+
+def _filter_mask(df: pd.DataFrame, key: Tuple) -> np.ndarray:
+    """Boolean row mask of the recipes passing every filter in `key`."""
+    mask = np.ones(len(df), dtype=bool)
+    for name, value in key:
+        col = FILTERS[name]
+        if col not in df.columns:
+            raise ValueError(f"Filter {name!r} needs a {col!r} column (see load_recipes)")
+        if name == "cuisine":
+            # whole path segments, case-insensitive: "italian" matches
+            # "/Cuisine/European/Italian/" but not "/Italian Bread/"
+            paths = "/" + df[col].fillna("").astype(str).str.strip("/").str.lower() + "/"
+            hit = np.zeros(len(df), dtype=bool)
+            for cuisine in value:
+                hit |= paths.str.contains(f"/{cuisine}/", regex=False).to_numpy()
+            mask &= hit
+        else:
+            # unknown (NaN) values never pass a numeric filter
+            values = df[col].to_numpy(dtype=np.float64)
+            mask &= values <= value if name.startswith("max_") else values >= value
+    return mask
+
+
+def _filter_plan(
+    df: pd.DataFrame,
+    index: IngredientIndex,
+    key: Tuple,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted rows passing `key` and the sorted ingredient IDs they use.
+
+    The rows restrict scoring and the IDs restrict fuzzy expansion, so a
+    restrictive filter makes a query cheaper. Plans are cached on the
+    index by catalog_key(df) as well as `key`: edited copies of a frame
+    share its index but not its filter columns.
+    """
+    plan_key = (catalog_key(df), key)
+    plan = index.filter_plans.get(plan_key)
+    if plan is None:
+        rows = np.flatnonzero(_filter_mask(df, key) & (index.sizes > 0))
+        subset = np.unique(index.matrix[rows].indices).astype(np.int64)
+        if len(index.filter_plans) >= FILTER_PLAN_CACHE_SIZE:
+            index.filter_plans.clear()
+        plan = index.filter_plans[plan_key] = (rows, subset)
+    return plan
+
+
 # -------------------------------------------------
 # MATCHING LOGIC - JACCARD + SIMPLER PASS SYSTEM
 # -------------------------------------------------
+# Share of the best match score a recipe needs to make the health ranking;
+# relative, because absolute scores depend a lot on the pantry's size
+HEALTH_MIN_MATCH = 0.6
+
+def _clean_user_cores(user_ings: List[str]) -> Set[str]:
+    """Clean user ingredients to core names."""
+    user_cores: Set[str] = set()
+    with METRICS.span("clean"):
+        for u in user_ings or []:
+            core = _clean_ingredient_to_core(u)
+            if core:
+                user_cores.add(core)
+    return user_cores
+
+
+class MatchCursor:
+    """
+    Ranked results of one query, served lazily page by page.
+
+    Holds the scored candidate arrays of a single scoring pass. The first
+    page is picked with the bounded heap in _top_k; asking for more sorts
+    the candidates once, after which every page is a slice. Either way a
+    page only builds dicts for the recipes it returns.
+
+    healthiest() and pareto_front() rank the same candidates by health,
+    so a health column never needs a second catalog scan.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        index: IngredientIndex,
+        user_cores: Set[str],
+        expansion: Dict[str, List[str]],
+        rows: np.ndarray,
+        matches: np.ndarray,
+        exact: np.ndarray,
+    ):
+        self.df = df
+        self.index = index
+        self.user_cores = set(user_cores)
+        self.expansion = dict(expansion)
+        self.rows = rows
+        self.matches = matches
+        self.sizes = index.sizes[rows]
+        self.scores = _score_arrays(len(user_cores), self.sizes, matches, exact)
+        self.served = 0
+        self._order: np.ndarray | None = None
+        self._health: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def has_more(self) -> bool:
+        return self.served < len(self.rows)
+
+    def next_page(self, n: int) -> List[Dict]:
+        """The next `n` recipes in score order (fewer at the end)."""
+        if n <= 0 or not self.has_more:
+            return []
+        with METRICS.span("rank"):
+            if self.served == 0 and self._order is None:
+                picked = _top_k(self.scores["score"], self.sizes, self.rows, n)
+            else:
+                if self._order is None:
+                    # same order as _top_k: score desc, size asc, row asc
+                    self._order = np.lexsort((self.rows, self.sizes, -self.scores["score"]))
+                picked = self._order[self.served:self.served + n].tolist()
+            self.served += len(picked)
+            return [self._result(k) for k in picked]
+
+    def __iter__(self) -> Iterator[Dict]:
+        while self.has_more:
+            yield from self.next_page(32)
+
+    def healthiest(self, n: int, min_match: float = HEALTH_MIN_MATCH) -> List[Dict]:
+        """
+        The `n` healthiest matches scoring at least `min_match` times the
+        best match score, from the same scoring pass (pages are unaffected).
+        """
+        with METRICS.span("rank.health"):
+            eligible = self._eligible(min_match)
+            picked = _top_k_healthy(
+                self.health[eligible], self.scores["score"][eligible],
+                self.sizes[eligible], self.rows[eligible], n,
+            )
+            return [self._result(int(eligible[k])) for k in picked]
+
+    def pareto_front(self, min_match: float = HEALTH_MIN_MATCH) -> List[Dict]:
+        """
+        Matches that no other match beats on both score and health (among
+        those eligible for healthiest()), best match first.
+        """
+        eligible = self._eligible(min_match)
+        front = _pareto_front(
+            self.scores["score"][eligible], self.health[eligible], self.sizes[eligible]
+        )
+        return [self._result(int(eligible[k])) for k in front]
+
+    @property
+    def health(self) -> np.ndarray:
+        if self._health is None:
+            self._health = self.df["health_score"].to_numpy(dtype=np.float64)[self.rows]
+        return self._health
+
+    def _eligible(self, min_match: float) -> np.ndarray:
+        """Positions whose score is at least `min_match` x the best score."""
+        score = self.scores["score"]
+        if len(score) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(score >= min_match * score.max())
+
+    def _result(self, k: int) -> Dict:
+        fields = {
+            "matches":     int(self.matches[k]),
+            "pct_recipe":  float(self.scores["pct_recipe"][k]),
+            "pct_user":    float(self.scores["pct_user"][k]),
+            "score":       float(self.scores["score"][k]),
+            "jaccard":     float(self.scores["jaccard"][k]),
+            "recipe_size": int(self.sizes[k]),
+        }
+        return _build_result(
+            self.df, self.index, int(self.rows[k]), self.user_cores, self.expansion, fields
+        )
+
+
+def _rank_results(
+    df: pd.DataFrame,
+    index: IngredientIndex,
+    user_cores: Set[str],
+    expansion: Dict[str, List[str]],
+    rows: np.ndarray,
+    matches: np.ndarray,
+    exact: np.ndarray,
+    quota: int,
+) -> List[Dict]:
+    """Score engine output, select the top `quota` and build their dicts."""
+    if len(rows) == 0:
+        return []
+    cursor = MatchCursor(df, index, user_cores, expansion, rows, matches, exact)
+    return cursor.next_page(quota)
+
+
 def match_recipes(
     user_ings: List[str],
     df: pd.DataFrame,
     quota: int = 7,
     hi_thresh: float = 0.5,  # kept for backwards compatibility (unused)
     lo_thresh: float = 0.3,  # kept for backwards compatibility (unused)
+    engine: str = "sparse",
+    use_cache: bool = True,
+    filters: Dict | None = None,
 ) -> List[Dict]:
     """
     Match recipes based on core ingredients.
@@ -354,84 +1743,300 @@ def match_recipes(
       - final score = 0.7 * pct_recipe + 0.3 * Jaccard
 
     Then simply returns the top `quota` recipes by score.
+
+    `engine` picks how match counts are computed: "sparse" (vectorized
+    over the recipes the pantry reaches) or "python" (per-recipe sets).
+    Both give identical results.
+
+    `filters` keeps only recipes with, e.g., {"max_minutes": 30,
+    "min_rating": 4.5, "min_servings": 4, "max_servings": 8,
+    "cuisine": "Italian"} (see FILTERS). They are applied as a precomputed
+    row mask before any fuzzy work, so restrictive filters are cheaper.
+
+    Results are memoized in RESULT_CACHE by (catalog, ENGINE_VERSION,
+    cleaned cores, quota, filters), so equivalent queries from any session
+    hit.
     """
-    if not user_ings:
-        return []
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {sorted(ENGINES)}")
+
+    METRICS.inc("queries")
+    with METRICS.span("query"):
+        fkey = _filter_key(filters)
+        user_cores = _clean_user_cores(user_ings)
+        if not user_cores:
+            return []
+
+        index, catalog = _get_bound(df)
+        key = (catalog, ENGINE_VERSION, frozenset(user_cores), quota, fkey)
+        if use_cache:
+            cached = RESULT_CACHE.get(key)
+            if cached is not None:
+                METRICS.inc("result_cache_hits")
+                return _copy_results(cached)
+
+        allowed = subset = None
+        if fkey is not None:
+            allowed, subset = _filter_plan(df, index, fkey)
+        if "health_score" not in df.columns:
+            df = df.assign(health_score=_compute_health_score(df))
+        expansion = index.expand(user_cores, threshold=FUZZY_THRESHOLD, subset=subset)
+        rows, matches, exact = ENGINES[engine](index, user_cores, expansion, rows=allowed)
+        results = _rank_results(df, index, user_cores, expansion, rows, matches, exact, quota)
+
+        if use_cache:
+            RESULT_CACHE.put(key, _copy_results(results))
+        return results
 
-    # Clean user ingredients to core names
-    user_cores: Set[str] = set()
-    for u in user_ings:
-        core = _clean_ingredient_to_core(u)
-        if core:
-            user_cores.add(core)
 
+def match_recipes_dual(
+    user_ings: List[str],
+    df: pd.DataFrame,
+    quota: int = 7,
+    min_match: float = HEALTH_MIN_MATCH,
+    pareto: bool = False,
+    engine: str = "sparse",
+    use_cache: bool = True,
+    filters: Dict | None = None,
+    keep_cursor: bool = False,
+) -> Dict[str, List[Dict]]:
+    """
+    Best-match and healthiest recipes from one scoring pass.
+
+    Returns {"match": top `quota` by match score (= match_recipes),
+    "health": top `quota` by health_score among recipes scoring at least
+    `min_match` x the best match score}. With `pareto`, "pareto" also
+    holds the match-vs-health Pareto front of those recipes.
+
+    Cached in RESULT_CACHE like match_recipes. With `keep_cursor`,
+    "cursor" holds the MatchCursor that scored them, already past the
+    "match" page, so later pages are slices of the same scores; it is
+    None on a cache hit (nothing was scored).
+    """
+    fkey = _filter_key(filters)
+    user_cores = _clean_user_cores(user_ings)
     if not user_cores:
-        return []
+        empty: Dict[str, List[Dict]] = {"match": [], "health": []}
+        if pareto:
+            empty["pareto"] = []
+        if keep_cursor:
+            empty["cursor"] = None
+        return empty
 
-    candidates: List[Dict] = []
+    key = (
+        catalog_key(df), ENGINE_VERSION, "dual",
+        frozenset(user_cores), quota, fkey, min_match, pareto,
+    )
+    if use_cache:
+        cached = RESULT_CACHE.get(key)
+        if cached is not None:
+            results = {name: _copy_results(rs) for name, rs in cached.items()}
+            if keep_cursor:
+                results["cursor"] = None
+            return results
 
-    # Score all recipes
-    for _, row in df.iterrows():
-        recipe_cores = row["ingredients_norm"]
-        if not recipe_cores:
-            continue
+    cursor = match_cursor(user_ings, df, engine=engine, filters=filters)
+    results = {
+        "match": cursor.next_page(quota),
+        "health": cursor.healthiest(quota, min_match),
+    }
+    if pareto:
+        results["pareto"] = cursor.pareto_front(min_match)
 
-        recipe_set = set(recipe_cores)
-        recipe_size = len(recipe_set)
+    if use_cache:
+        RESULT_CACHE.put(key, {name: _copy_results(rs) for name, rs in results.items()})
+    if keep_cursor:
+        results["cursor"] = cursor
+    return results
 
-        if recipe_size <= 1:
-            continue
 
-        # Fuzzy + exact intersection → recipe-side matched cores
-        matched_ingredients = _fuzzy_intersection(
-            user_cores=user_cores,
-            recipe_cores=recipe_set,
-            threshold=0.82,   # same threshold as before
+def match_recipes_batch(
+    list_of_ingredient_lists: List[List[str]],
+    df: pd.DataFrame,
+    quota: int = 7,
+    filters: Dict | None = None,
+) -> List[List[Dict]]:
+    """
+    match_recipes for many pantries at once (offline replays, evaluation).
+
+    All pantries are cleaned up front, fuzzy expansion runs once for the
+    union of their cores, and every pantry is scored against the catalog
+    in one sparse matrix-matrix product. Returns one top-`quota` list per
+    pantry, identical to calling match_recipes on each (with the same
+    `filters`, which apply to every pantry).
+    """
+    fkey = _filter_key(filters)
+    pantries = [_clean_user_cores(ings) for ings in list_of_ingredient_lists]
+    results: List[List[Dict]] = [[] for _ in pantries]
+    active = [i for i, cores in enumerate(pantries) if cores]
+    if not active:
+        return results
+
+    index = _get_index(df)
+    allowed = subset = None
+    if fkey is not None:
+        allowed, subset = _filter_plan(df, index, fkey)
+    if "health_score" not in df.columns:
+        df = df.assign(health_score=_compute_health_score(df))
+    all_cores: Set[str] = set().union(*(pantries[i] for i in active))
+    expansion = index.expand(all_cores, threshold=FUZZY_THRESHOLD, subset=subset)
+
+    counts = _sparse_counts(
+        index, [pantries[i] for i in active], expansion,
+        rows=_candidates(index, expansion, allowed),
+    )
+    for i, (rows, matches, exact) in zip(active, counts):
+        results[i] = _rank_results(
+            df, index, pantries[i], expansion, rows, matches, exact, quota
         )
-        matches = len(matched_ingredients)
+    return results
 
-        if matches == 0:
-            continue
 
-        # Percent of the recipe you can actually cook
-        pct_recipe = matches / recipe_size if recipe_size > 0 else 0.0
-
-        # Percent of your list that got used (still useful for display)
-        pct_user = matches / len(user_cores) if user_cores else 0.0
-
-        # Jaccard similarity between user + recipe ingredient sets
-        union_size = len(user_cores | recipe_set)
-        jaccard = matches / union_size if union_size > 0 else 0.0
-
-        # Final match score: emphasize "how complete is this recipe"
-        match_score = 0.7 * pct_recipe + 0.3 * jaccard
-
-        health_score = _compute_health_score(row)
-
-        candidates.append({
-            "name":         row["display_name"],
-            "matches":      matches,
-            "pct_recipe":   pct_recipe,
-            "pct_user":     pct_user,
-            "score":        match_score,
-            "jaccard":      jaccard,
-            "recipe_size":  recipe_size,
-            "health_score": health_score,
-            "protein_g":    float(row.get("protein_g", 0.0) or 0.0),
-            "fat_g":        float(row.get("fat_g", 0.0) or 0.0),
-            "sugar_g":      float(row.get("sugar_g", 0.0) or 0.0),
-            "carbs_g":      float(row.get("carbs_g", 0.0) or 0.0),
-            "url":          str(row.get("url", "") or ""),
-            # for debugging / potential UI use
-            "matched_cores": sorted(matched_ingredients),
-            "user_cores":    sorted(user_cores),
-        })
-
-    if not candidates:
-        return []
+def match_cursor(
+    user_ings: List[str],
+    df: pd.DataFrame,
+    engine: str = "sparse",
+    filters: Dict | None = None,
+) -> MatchCursor:
+    """
+    Score the catalog once and return a MatchCursor over every match.
+
+    Page 1 of the cursor equals match_recipes(user_ings, df, quota=n,
+    filters=filters); later pages ("Load more") come from the same scores
+    without rescanning.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {sorted(ENGINES)}")
 
-    # Sort by score, then by smaller recipe size (simpler recipes first)
-    candidates.sort(key=lambda c: (-c["score"], c["recipe_size"]))
+    fkey = _filter_key(filters)
+    index = _get_index(df)
+    allowed = subset = None
+    if fkey is not None:
+        allowed, subset = _filter_plan(df, index, fkey)
+    if "health_score" not in df.columns:
+        df = df.assign(health_score=_compute_health_score(df))
+    user_cores = _clean_user_cores(user_ings)
+    if not user_cores:
+        empty = np.empty(0, dtype=np.int64)
+        return MatchCursor(df, index, user_cores, {}, empty, empty, empty)
+
+    expansion = index.expand(user_cores, threshold=FUZZY_THRESHOLD, subset=subset)
+    rows, matches, exact = ENGINES[engine](index, user_cores, expansion, rows=allowed)
+    return MatchCursor(df, index, user_cores, expansion, rows, matches, exact)
+
+
+def iter_matches(
+    user_ings: List[str],
+    df: pd.DataFrame,
+    engine: str = "sparse",
+    filters: Dict | None = None,
+) -> Iterator[Dict]:
+    """Yield every matching recipe lazily, best first."""
+    yield from match_cursor(user_ings, df, engine=engine, filters=filters)
+
+
+# -------------------------------------------------
+# INCREMENTAL QUERY SESSION
+# -------------------------------------------------
+class QuerySession:
+    """
+    Incremental match state for one user's pantry.
+
+    Keeps per-recipe match counts and exact overlaps for the current
+    cores. Adding or removing a core only re-counts the recipes reachable
+    through that core's (fuzzily expanded) postings; top() then ranks
+    from the stored counts, exactly like match_recipes.
+    """
+
+    def __init__(self, df: pd.DataFrame, quota: int = 7):
+        self.index = _get_index(df)
+        if "health_score" not in df.columns:
+            df = df.assign(health_score=_compute_health_score(df))
+        self.df = df
+        self.quota = quota
+        n_rows = len(self.index.sizes)
+        self.matches = np.zeros(n_rows, dtype=np.int64)
+        self.exact = np.zeros(n_rows, dtype=np.int64)
+        # user core -> its vocabulary expansion
+        self.expansion: Dict[str, List[str]] = {}
+        # user core -> how many raw ingredients clean to it
+        self._counts: Dict[str, int] = {}
+
+    @property
+    def user_cores(self) -> Set[str]:
+        return set(self.expansion)
+
+    def is_for(self, df: pd.DataFrame) -> bool:
+        """Whether this session was built on `df`'s catalog."""
+        return _get_index(df) is self.index
+
+    def add(self, ingredient: str) -> None:
+        """Add one raw ingredient (e.g. "2 Red Onions")."""
+        core = _clean_ingredient_to_core(ingredient)
+        if not core:
+            return
+        self._counts[core] = self._counts.get(core, 0) + 1
+        if core not in self.expansion:
+            self.expansion[core] = self.index.expand({core})[core]
+            self._recount(self.expansion[core])
+
+    def remove(self, ingredient: str) -> None:
+        """Remove one raw ingredient previously added."""
+        core = _clean_ingredient_to_core(ingredient)
+        if core not in self._counts:
+            return
+        self._counts[core] -= 1
+        if self._counts[core] == 0:
+            del self._counts[core]
+            self._recount(self.expansion.pop(core))
+
+    def update(self, user_ings: List[str]) -> None:
+        """Sync to a whole ingredient list, applying only the differences."""
+        wanted: Dict[str, int] = {}
+        for ing in user_ings or []:
+            core = _clean_ingredient_to_core(ing)
+            if core:
+                wanted[core] = wanted.get(core, 0) + 1
+
+        for core in sorted(set(self.expansion) - set(wanted)):
+            del self._counts[core]
+            self._recount(self.expansion.pop(core))
+        for core in sorted(set(wanted) - set(self.expansion)):
+            self.expansion[core] = self.index.expand({core})[core]
+            self._recount(self.expansion[core])
+        self._counts = wanted
+
+    def top(self, quota: int | None = None, filters: Dict | None = None) -> List[Dict]:
+        """Current top recipes, identical to match_recipes on the same pantry."""
+        return self.cursor(filters).next_page(self.quota if quota is None else quota)
+
+    def cursor(self, filters: Dict | None = None) -> MatchCursor:
+        """
+        A MatchCursor over the current pantry's matches (a snapshot).
+
+        Counts cover the whole catalog, so `filters` only mask the rows
+        that get ranked; changing them never re-counts anything.
+        """
+        rows = np.flatnonzero(self.matches)
+        fkey = _filter_key(filters)
+        if fkey is not None:
+            allowed, _ = _filter_plan(self.df, self.index, fkey)
+            rows = np.intersect1d(rows, allowed, assume_unique=True)
+        return MatchCursor(
+            self.df, self.index, self.user_cores, self.expansion,
+            rows, self.matches[rows], self.exact[rows],
+        )
 
-    # NEW: just take the top-K; no multi-pass quota filling
-    return candidates[:quota]
+    def _recount(self, cores: List[str]) -> None:
+        """Re-count only the recipes that use any of `cores`."""
+        if not cores:
+            return
+        touched = np.unique(np.concatenate([self.index.rows_for(c) for c in cores]))
+        self.matches[touched] = 0
+        self.exact[touched] = 0
+        if self.expansion:
+            rows, matches, exact = _sparse_counts(
+                self.index, [self.user_cores], self.expansion, rows=touched
+            )[0]
+            self.matches[rows] = matches
+            self.exact[rows] = exact
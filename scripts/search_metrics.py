@@ -0,0 +1,195 @@
+# scripts/search_metrics.py
+from __future__ import annotations
+from bisect import bisect_left
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Tuple
+import json
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the stage latency histograms
+TIME_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+# Upper bounds of the per-query size histograms (rows, comparisons, ...)
+SIZE_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """Fixed-bucket histogram: per-bucket counts plus sum and count."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, observations <= le) pairs, Prometheus style, ending at +Inf."""
+        out, running = [], 0
+        for bound, n in zip([*map(_fmt, self.bounds), "+Inf"], self.counts):
+            running += n
+            out.append((bound, running))
+        return out
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "SearchMetrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics._observe(
+            self.metrics._stages, self.name, time.perf_counter() - self.start, TIME_BUCKETS
+        )
+        return False
+
+
+class SearchMetrics:
+    """
+    Switchable timing spans, counters and size histograms.
+
+    Disabled (the default), span() hands back a shared no-op context
+    manager and inc() / observe() return immediately, so instrumented
+    code pays about one attribute check per call. Set PANTRYPAL_METRICS=1
+    or call enable() to start recording.
+    """
+
+    def __init__(self, enabled: bool = False, prefix: str = "pantrypal"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._sizes.clear()
+            self._counters.clear()
+
+    def span(self, stage: str):
+        """Context manager timing one pass through `stage`."""
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, stage)
+
+    def inc(self, name: str, n: float = 1) -> None:
+        """Add `n` to a running counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float) -> None:
+        """Record one per-query size (rows scanned, comparisons, ...)."""
+        if self.enabled:
+            self._observe(self._sizes, name, value, SIZE_BUCKETS)
+
+    def _observe(self, table: Dict[str, Histogram], name: str, value: float, bounds) -> None:
+        with self._lock:
+            hist = table.get(name)
+            if hist is None:
+                hist = table[name] = Histogram(bounds)
+            hist.observe(value)
+
+    # ---------------- export ----------------
+    def snapshot(self) -> Dict:
+        """JSON-ready copy of everything recorded so far."""
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "stages_seconds": {k: h.snapshot() for k, h in sorted(self._stages.items())},
+                "sizes": {k: h.snapshot() for k, h in sorted(self._sizes.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        p = self.prefix
+        lines: List[str] = []
+        with self._lock:
+            if self._stages:
+                lines += [
+                    f"# HELP {p}_stage_seconds Time spent per search pipeline stage.",
+                    f"# TYPE {p}_stage_seconds histogram",
+                ]
+                for stage, hist in sorted(self._stages.items()):
+                    lines += _histogram_lines(f"{p}_stage_seconds", f'stage="{stage}"', hist)
+            for name, hist in sorted(self._sizes.items()):
+                metric = f"{p}_{_metric_name(name)}"
+                lines += [
+                    f"# HELP {metric} Per-query {name.replace('_', ' ')}.",
+                    f"# TYPE {metric} histogram",
+                ]
+                lines += _histogram_lines(metric, "", hist)
+            for name, value in sorted(self._counters.items()):
+                metric = f"{p}_{_metric_name(name)}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {_fmt(value)}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str | Path) -> None:
+        """Write to_prometheus() atomically (e.g. for node_exporter's textfile collector)."""
+        _write_atomic(Path(path), self.to_prometheus())
+
+    def write_json(self, path: str | Path) -> None:
+        _write_atomic(Path(path), json.dumps(self.snapshot(), indent=2) + "\n")
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _histogram_lines(metric: str, labels: str, hist: Histogram) -> List[str]:
+    sep = "," if labels else ""
+    lines = [
+        f'{metric}_bucket{{{labels}{sep}le="{le}"}} {n}'
+        for le, n in hist.cumulative()
+    ]
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{metric}_sum{suffix} {_fmt(hist.sum)}")
+    lines.append(f"{metric}_count{suffix} {hist.count}")
+    return lines
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)